@@ -4,6 +4,11 @@ import sys
 import plistlib
 from PyInstaller.utils.hooks import collect_submodules, collect_data_files
 
+# снимок справочника для быстрого старта: собираем заново при каждой сборке
+sys.path.insert(0, SPECPATH)
+from catalog_snapshot import build_snapshot
+build_snapshot("bridge_defects.db", "catalog.snapshot")
+
 APP_NAME = "BridgeReportTool"
 
 ICON_MAC = "icon.icns"
@@ -11,6 +16,7 @@ ICON_WIN = "icon.ico"
 
 datas = [
     ("bridge_defects.db", "."),
+    ("catalog.snapshot", "."),
     ("report_template.docx", "."),
     ("inspection_report_template.docx", "."),
 ]
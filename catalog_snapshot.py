@@ -0,0 +1,113 @@
+# catalog_snapshot.py
+import hashlib
+import os
+import pickle
+import sqlite3
+
+from constants import DB_PATH, CATALOG_SNAPSHOT_PATH
+from utils import sort_placements
+
+SNAPSHOT_VERSION = 1
+
+
+def db_hash(db_path=DB_PATH) -> str:
+    """SHA-1 файла БД — по нему снимок сверяется с bridge_defects.db"""
+    h = hashlib.sha1()
+    with open(db_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def display_names(rows) -> list:
+    """Список для Combobox «Тип дефекта»: имя (локализация), без повторов"""
+    names = set()
+    for row in rows:
+        name, localization = row[1], row[7]
+        names.add(f"{name} ({localization})" if localization else name)
+    return sorted(names)
+
+
+def build_snapshot(db_path=DB_PATH, out_path=CATALOG_SNAPSHOT_PATH) -> str:
+    """
+    Читает справочник дефектов из SQLite и сохраняет его в бинарный снимок:
+    разделы, строки дефектов по разделам, готовые списки для выбора,
+    мероприятия по num_ODM и диапазоны minValue/maxvalue.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT name FROM placements")
+        placements = sort_placements([row[0] for row in cur.fetchall()])
+
+        defects_by_placement = {}
+        for placement in placements:
+            cur.execute(
+                "SELECT num_ODM, name, option, safetyClass, durabilityClass, "
+                "repairabilityClass, loadCapacity, localizationODM, units, qty_rule "
+                "FROM defect_types WHERE placement = ?",
+                (placement,)
+            )
+            defects_by_placement[placement] = cur.fetchall()
+
+        # как в get_repair_action: первая непустая запись по num_ODM
+        repair_actions = {}
+        cur.execute("SELECT num_ODM, repairAction FROM defect_types")
+        for num_odm, action in cur.fetchall():
+            if num_odm not in repair_actions:
+                repair_actions[num_odm] = action or ""
+
+        cur.execute(
+            "SELECT num_ODM, name, option, minValue, maxvalue, safetyClass, "
+            "durabilityClass, repairabilityClass, loadCapacity, units "
+            "FROM defect_types "
+            "WHERE minValue IS NOT NULL OR maxvalue IS NOT NULL"
+        )
+        ranges = cur.fetchall()
+    finally:
+        conn.close()
+
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "db_hash": db_hash(db_path),
+        "placements": placements,
+        "defects_by_placement": defects_by_placement,
+        "display_by_placement": {
+            p: display_names(rows) for p, rows in defects_by_placement.items()
+        },
+        "repair_actions": repair_actions,
+        "ranges": ranges,
+    }
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def load_snapshot(path=CATALOG_SNAPSHOT_PATH, db_path=DB_PATH):
+    """
+    Загружает снимок справочника. Возвращает None, если снимка нет,
+    он повреждён или устарел относительно текущей БД — тогда работаем с SQLite.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    try:
+        if data.get("db_hash") != db_hash(db_path):
+            return None
+    except OSError:
+        return None
+    return data
+
+
+if __name__ == "__main__":
+    print(f"Снимок справочника создан: {build_snapshot()}")
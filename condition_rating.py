@@ -0,0 +1,151 @@
+# condition_rating.py
+from collections import Counter, defaultdict
+
+from defect_view import placement_order
+
+# категории дефекта: поле записи -> буква
+CATEGORY_FIELDS = {
+    "safety": "Б",
+    "durability": "Д",
+    "repairability": "Р",
+    "loadcap": "Г",
+}
+
+# класс состояния элемента / сооружения -> наименование
+CONDITION_NAMES = {
+    0: "исправное",
+    1: "работоспособное",
+    2: "ограниченно работоспособное",
+    3: "неработоспособное",
+    4: "аварийное",
+}
+
+def _value(rec: dict, field: str) -> int:
+    try:
+        return max(0, int(rec.get(field) or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def condition_class(worst: dict) -> int:
+    """
+    Класс состояния по худшим категориям (ОДМ 218.3.042-2014):
+    определяется наиболее опасным дефектом по безопасности (Б)
+    и долговечности (Д). Категория Г на класс не влияет — в справочнике
+    она стоит и у дефектов «работоспособность обеспечена» (Б0 Д1 Г1)
+    и означает лишь, что нужна проверка грузоподъёмности (см. needs_loadcap_check).
+    """
+    cls = max(worst.get("safety", 0), worst.get("durability", 0))
+    return min(cls, max(CONDITION_NAMES))
+
+
+def needs_loadcap_check(worst: dict) -> bool:
+    """Есть дефекты категории Г — грузоподъёмность нужно проверить расчётом"""
+    return bool(worst.get("loadcap", 0))
+
+
+class ConditionRating:
+    """
+    Оценка технического состояния по категориям дефектов.
+
+    Для каждого элемента (раздела Формы 5) хранятся счётчики значений
+    каждой категории, поэтому добавление/удаление/правка дефекта меняет
+    только несколько счётчиков, а худшее значение берётся из не более
+    чем пяти ключей — без прохода по всем дефектам.
+    """
+
+    def __init__(self, records=()):
+        # раздел -> поле -> Counter(значение -> число дефектов)
+        self._counts = defaultdict(lambda: {f: Counter() for f in CATEGORY_FIELDS})
+        self._totals = Counter()
+        for rec in records:
+            self.add(rec)
+
+    def add(self, rec: dict, sign: int = 1):
+        placement = rec.get("placement", "") or ""
+        counts = self._counts[placement]
+        for field in CATEGORY_FIELDS:
+            value = _value(rec, field)
+            counts[field][value] += sign
+            if counts[field][value] <= 0:
+                del counts[field][value]
+        self._totals[placement] += sign
+        if self._totals[placement] <= 0:
+            del self._totals[placement]
+            del self._counts[placement]
+
+    def remove(self, rec: dict):
+        self.add(rec, sign=-1)
+
+    def update(self, rec: dict, old_fields: dict):
+        """rec уже изменён; old_fields — прежние значения изменённых полей"""
+        self.remove({**rec, **old_fields})
+        self.add(rec)
+
+    # ---------- результаты ----------
+
+    def element_worst(self, placement: str) -> dict:
+        counts = self._counts.get(placement)
+        if counts is None:
+            return {f: 0 for f in CATEGORY_FIELDS}
+        return {f: max(c) if c else 0 for f, c in counts.items()}
+
+    def elements(self) -> list:
+        """[(раздел, число дефектов, худшие категории, класс)] в порядке экспорта"""
+        result = []
+        for placement in sorted(self._totals, key=placement_order):
+            worst = self.element_worst(placement)
+            result.append((placement, self._totals[placement], worst,
+                           condition_class(worst)))
+        return result
+
+    def bridge_worst(self) -> dict:
+        worst = {f: 0 for f in CATEGORY_FIELDS}
+        for placement in self._totals:
+            for f, v in self.element_worst(placement).items():
+                worst[f] = max(worst[f], v)
+        return worst
+
+    def bridge_class(self) -> int:
+        return condition_class(self.bridge_worst())
+
+    @property
+    def total(self) -> int:
+        return sum(self._totals.values())
+
+    def summary(self) -> str:
+        """Строка для интерфейса: «Состояние: 2 — ограниченно работоспособное (Б3, Д2)»"""
+        worst = self.bridge_worst()
+        cls = condition_class(worst)
+        cats = [f"{CATEGORY_FIELDS[f]}{v}" for f, v in worst.items()
+                if v and f != "loadcap"]
+        text = f"Состояние: {cls} — {CONDITION_NAMES[cls]}"
+        if cats:
+            text = f"{text} ({', '.join(cats)})"
+        if needs_loadcap_check(worst):
+            text += "; Г — проверить грузоподъёмность"
+        return text
+
+    def mapping(self) -> dict:
+        """Плейсхолдеры {{bridge.condition_*}} для шаблонов Word"""
+        worst = self.bridge_worst()
+        cls = condition_class(worst)
+        lines = []
+        for placement, count, element_worst, element_cls in self.elements():
+            if not placement:
+                continue
+            name = placement.split(".", 1)[-1].strip()
+            line = f"{name} — {element_cls} ({CONDITION_NAMES[element_cls]})"
+            if needs_loadcap_check(element_worst):
+                line += ", требуется проверка грузоподъёмности"
+            lines.append(line)
+        return {
+            "{{bridge.condition_class}}": str(cls),
+            "{{bridge.condition_name}}": CONDITION_NAMES[cls],
+            "{{bridge.condition_safety}}": str(worst["safety"]),
+            "{{bridge.condition_durability}}": str(worst["durability"]),
+            "{{bridge.condition_repairability}}": str(worst["repairability"]),
+            "{{bridge.condition_loadcap}}": "да" if needs_loadcap_check(worst) else "нет",
+            "{{bridge.condition_defects}}": str(self.total),
+            "{{bridge.condition_elements}}": "; ".join(lines),
+        }
@@ -11,5 +11,15 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 DB_PATH = resource_path("bridge_defects.db")
+CATALOG_SNAPSHOT_PATH = resource_path("catalog.snapshot")
 TEMPLATE_PATH = resource_path("report_template.docx")
 REPORT_TEMPLATE_PATH = resource_path("inspection_report_template.docx")
+
+# пользовательские данные приложения (автосохранение, кэши)
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".bridge_reptool")
+UNTITLED_PROJECT_PATH = os.path.join(APP_DATA_DIR, "untitled.json")
+WORKSPACE_INDEX_PATH = os.path.join(APP_DATA_DIR, "workspace_index.db")
+THUMBS_DIR = os.path.join(APP_DATA_DIR, "thumbs")
+PHOTO_META_DIR = os.path.join(APP_DATA_DIR, "photo_meta")
+MAPS_DIR = os.path.join(APP_DATA_DIR, "maps")
+MAPS_LOCAL_DIR = os.path.join(APP_DATA_DIR, "maps_local")
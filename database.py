@@ -2,20 +2,40 @@
 import sqlite3
 from constants import DB_PATH
 from utils import sort_placements
+from catalog_snapshot import load_snapshot, display_names
 
 class Database:
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.cursor = self.conn.cursor()
+        # справочник берём из снимка (catalog.snapshot), если он актуален;
+        # SQLite открываем только когда без него не обойтись
+        self.snapshot = load_snapshot()
+        self._conn = None
+        self._cursor = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(DB_PATH)
+        return self._conn
+
+    @property
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.conn.cursor()
+        return self._cursor
 
     def get_placements(self):
         """Возвращает список разделов, отсортированных по номеру"""
+        if self.snapshot:
+            return list(self.snapshot["placements"])
         self.cursor.execute("SELECT DISTINCT name FROM placements")
         placements = [row[0] for row in self.cursor.fetchall()]
         return sort_placements(placements)
 
     def get_defects_by_placement(self, placement):
         """Возвращает дефекты для конкретного раздела"""
+        if self.snapshot:
+            return list(self.snapshot["defects_by_placement"].get(placement, []))
         self.cursor.execute(
             "SELECT num_ODM, name, option, safetyClass, durabilityClass, "
             "repairabilityClass, loadCapacity, localizationODM, units, qty_rule "
@@ -24,7 +44,17 @@ class Database:
         )
         return self.cursor.fetchall()
 
+    def get_defect_display_names(self, placement, rows=None):
+        """Отсортированный список «имя (локализация)» для раздела"""
+        if self.snapshot:
+            return list(self.snapshot["display_by_placement"].get(placement, []))
+        if rows is None:
+            rows = self.get_defects_by_placement(placement)
+        return display_names(rows)
+
     def get_repair_action(self, num_odm: str) -> str:
+        if self.snapshot:
+            return self.snapshot["repair_actions"].get(num_odm, "") or ""
         self.cursor.execute("""
             SELECT repairAction
             FROM defect_types
@@ -32,4 +62,16 @@ class Database:
             LIMIT 1
         """, (num_odm,))
         row = self.cursor.fetchone()
-        return row[0] if row and row[0] else ""
\ No newline at end of file
+        return row[0] if row and row[0] else ""
+
+    def get_defect_ranges(self):
+        """Возвращает варианты дефектов, для которых задан диапазон minValue/maxvalue"""
+        if self.snapshot:
+            return list(self.snapshot["ranges"])
+        self.cursor.execute(
+            "SELECT num_ODM, name, option, minValue, maxvalue, safetyClass, "
+            "durabilityClass, repairabilityClass, loadCapacity, units "
+            "FROM defect_types "
+            "WHERE minValue IS NOT NULL OR maxvalue IS NOT NULL"
+        )
+        return self.cursor.fetchall()
@@ -0,0 +1,86 @@
+# defect_ranges.py
+import bisect
+import math
+from collections import defaultdict, namedtuple
+
+# Вариант дефекта с диапазоном значений [lo, hi) из minValue / maxvalue
+RangeOption = namedtuple(
+    "RangeOption",
+    "lo hi name option safety durability repairability loadcap units"
+)
+
+
+def parse_measurement(text):
+    """Разбирает введённое значение ('0,3', '12.5') в float, иначе None"""
+    s = (str(text) if text is not None else "").strip().replace(",", ".")
+    if s == "":
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+class DefectRangeIndex:
+    """
+    Интервальный индекс вариантов дефекта по num_ODM.
+
+    Для каждого num_ODM хранит варианты, отсортированные по нижней границе,
+    и по измеренному значению находит нужный вариант бинарным поиском.
+    Пустая граница в БД означает открытый интервал (<0.75, ≥0.99 и т.п.).
+    """
+
+    def __init__(self, rows):
+        grouped = defaultdict(list)
+        for num_odm, name, option, lo, hi, s, d, r, l, units in rows:
+            grouped[num_odm].append(RangeOption(
+                -math.inf if lo is None else float(lo),
+                math.inf if hi is None else float(hi),
+                name, option or "", s, d, r, l, units or ""
+            ))
+
+        self._items = {}
+        self._lows = {}
+        for num_odm, items in grouped.items():
+            items.sort(key=lambda x: (x.lo, x.hi))
+            self._items[num_odm] = items
+            self._lows[num_odm] = [x.lo for x in items]
+
+    def has_ranges(self, num_odm) -> bool:
+        return num_odm in self._items
+
+    def options(self, num_odm) -> list:
+        return list(self._items.get(num_odm, ()))
+
+    def classify(self, num_odm, value):
+        """
+        Возвращает RangeOption, в диапазон которого попадает value, или None.
+        Границы полуоткрытые [lo, hi); верхняя граница последнего
+        диапазона считается включённой.
+        """
+        items = self._items.get(num_odm)
+        if not items or value is None:
+            return None
+
+        i = bisect.bisect_right(self._lows[num_odm], value) - 1
+        closed_match = None
+        while i >= 0:
+            item = items[i]
+            if value < item.hi:
+                return item
+            if value == item.hi and closed_match is None:
+                closed_match = item
+            i -= 1
+        return closed_match
+
+    def classify_many(self, num_odm, values) -> list:
+        """
+        Пакетная классификация замеров: на каждое значение —
+        RangeOption или None (значение не разобрано / вне диапазонов).
+        """
+        result = []
+        for v in values:
+            if not isinstance(v, (int, float)):
+                v = parse_measurement(v)
+            result.append(self.classify(num_odm, v))
+        return result
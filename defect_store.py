@@ -0,0 +1,177 @@
+# defect_store.py
+from utils import generate_uid
+
+
+class DefectStore:
+    """
+    Дефекты Формы 5: записи в порядке добавления + индекс uid -> запись.
+
+    Поиск, правка и удаление по uid — O(1) на запись; список для доступа
+    по позиции (таблица, экспорт) собирается лениво и кэшируется до
+    следующей вставки в середину (удаление правит кэш на месте). В файл проекта store пишется
+    обычным списком (to_list), при загрузке список оборачивается снова.
+    Записи без uid или с повторяющимся uid получают новый uid.
+    Добавленные и изменённые записи помечаются (dirty_uids) — контейнер
+    .bdrt переписывает только их строки.
+    """
+
+    def __init__(self, records=()):
+        self._by_uid = {}
+        self._order = None  # кэш: записи по порядку
+        self._pos = None    # кэш: uid -> позиция
+        self._dirty = set()  # uid, изменённые после последнего mark_clean()
+        for rec in records:
+            if isinstance(rec, dict):
+                self._put(rec)
+
+    def _put(self, rec: dict):
+        uid = rec.get("uid")
+        if not uid or uid in self._by_uid:
+            uid = rec["uid"] = generate_uid()
+        self._by_uid[uid] = rec
+        self._dirty.add(uid)
+        return uid
+
+    def _invalidate(self):
+        self._order = None
+        self._pos = None
+
+    # ---------- чтение ----------
+
+    def __len__(self):
+        return len(self._by_uid)
+
+    def __iter__(self):
+        return iter(self._by_uid.values())
+
+    def __contains__(self, uid):
+        return uid in self._by_uid
+
+    def __getitem__(self, index):
+        return self.records()[index]
+
+    def get(self, uid):
+        return self._by_uid.get(uid)
+
+    def records(self) -> list:
+        """Записи по порядку (общий кэш — не изменять)"""
+        if self._order is None:
+            self._order = list(self._by_uid.values())
+        return self._order
+
+    def index(self, uid) -> int:
+        if self._pos is None:
+            self._pos = {rec["uid"]: i for i, rec in enumerate(self.records())}
+        return self._pos[uid]
+
+    def to_list(self) -> list:
+        return list(self._by_uid.values())
+
+    def dirty_uids(self) -> set:
+        return set(self._dirty)
+
+    def mark_clean(self):
+        """Текущее состояние записано в файл"""
+        self._dirty.clear()
+
+    # ---------- изменения ----------
+
+    def load_page(self, records):
+        """
+        Дописывает в конец очередную порцию записей, прочитанных из файла.
+        Записи не помечаются изменёнными (кроме получивших новый uid).
+        """
+        for rec in records:
+            if not isinstance(rec, dict):
+                continue
+            uid = rec.get("uid")
+            fresh = bool(uid) and uid not in self._by_uid
+            uid = self.add(rec)
+            if fresh:
+                self._dirty.discard(uid)
+
+    def add(self, rec: dict, index: int = None) -> str:
+        """Добавляет запись в конец (O(1)) или на позицию index. Возвращает uid"""
+        if index is not None and index < len(self):
+            self.insert_many([(index, rec)])
+            return rec["uid"]
+
+        uid = self._put(rec)
+        if self._order is not None:
+            self._order.append(rec)
+        if self._pos is not None:
+            self._pos[uid] = len(self._by_uid) - 1
+        return uid
+
+    def insert_many(self, items):
+        """
+        Вставляет [(позиция, запись)] по возрастанию позиций — обратное
+        действие к remove(); порядок пересобирается один раз на всю пачку.
+        """
+        items = list(items)
+        # частый случай — дописывание в конец, без пересборки порядка
+        if all(index >= len(self) + k for k, (index, _) in enumerate(items)):
+            for _, rec in items:
+                self.add(rec)
+            return
+
+        order = self.to_list()
+        for index, rec in items:
+            uid = rec.get("uid")
+            if not uid or uid in self._by_uid:
+                rec["uid"] = generate_uid()
+            self._by_uid[rec["uid"]] = rec
+            self._dirty.add(rec["uid"])
+            order.insert(index, rec)
+        self._by_uid = {rec["uid"]: rec for rec in order}
+        self._invalidate()
+
+    def update(self, uid, fields: dict):
+        """Меняет поля записи, возвращает их прежние значения (None — нет записи)"""
+        rec = self._by_uid.get(uid)
+        if rec is None:
+            return None
+        old = {k: rec.get(k, "") for k in fields}
+        rec.update(fields)
+        self._dirty.add(uid)
+        return old
+
+    def update_many(self, changes: dict) -> dict:
+        """{uid: поля} -> {uid: прежние значения} для найденных записей"""
+        old = {}
+        for uid, fields in changes.items():
+            prev = self.update(uid, fields)
+            if prev is not None:
+                old[uid] = prev
+        return old
+
+    def remove(self, uids) -> list:
+        """
+        Удаляет записи пачкой, возвращает [(позиция, запись)] по возрастанию
+        позиций — в таком виде их принимает insert_many() для отмены.
+        """
+        uids = [uid for uid in set(uids) if uid in self._by_uid]
+        if not uids:
+            return []
+        order = self.records()
+        removed = sorted((self.index(uid), self._by_uid[uid]) for uid in uids)
+        for uid in uids:
+            del self._by_uid[uid]
+            del self._pos[uid]
+            self._dirty.discard(uid)
+
+        # кэши правятся на месте: сдвигается только хвост после первой
+        # удалённой записи, удаление в цикле не пересобирает индекс целиком
+        start = removed[0][0]
+        gone = set(uids)
+        tail = [rec for rec in order[start:] if rec["uid"] not in gone]
+        del order[start:]
+        order.extend(tail)
+        for i, rec in enumerate(tail, start):
+            self._pos[rec["uid"]] = i
+        return removed
+
+    def clear(self):
+        self._by_uid.clear()
+        self._dirty.clear()
+        self._invalidate()
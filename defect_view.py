@@ -0,0 +1,284 @@
+# defect_view.py
+import re
+from bisect import bisect_left, bisect_right
+from functools import total_ordering
+
+# столбец таблицы Формы 5 -> поле записи
+COLUMN_FIELDS = {
+    "Раздел": "placement",
+    "Местоположение": "location",
+    "Тип": "name",
+    "Описание": "option",
+    "Категории": None,  # сортируется по набору категорий
+    "Мероприятия": "action",
+}
+
+# быстрый фильтр по категории: подпись -> (поле, минимальное значение)
+CATEGORY_FILTERS = {
+    "Б≥2": ("safety", 2),
+    "Б≥3": ("safety", 3),
+    "Б≥4": ("safety", 4),
+    "Д≥2": ("durability", 2),
+    "Д≥3": ("durability", 3),
+    "Д≥4": ("durability", 4),
+    "Р≥3": ("repairability", 3),
+    "Г": ("loadcap", 1),
+}
+
+TEXT_FIELDS = ("placement", "location", "name", "option", "action")
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def placement_order(placement: str):
+    """Порядок разделов как в экспорте: по номеру, без номера — в конце"""
+    head = (placement or "").split(".", 1)[0]
+    return (int(head) if head.isdigit() else 999, placement or "")
+
+
+def natural_key(text: str) -> tuple:
+    """«Пролёт 10» после «Пролёт 9»: числа сравниваются как числа"""
+    parts = _DIGITS.split((text or "").lower())
+    return tuple(int(p) if i % 2 else p for i, p in enumerate(parts))
+
+
+def _category(rec: dict, field: str) -> int:
+    try:
+        return int(rec.get(field) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@total_ordering
+class _Desc:
+    """Обёртка ключа для сортировки по убыванию внутри составного ключа"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class DefectView:
+    """
+    Представление списка дефектов для таблицы: сортировка по столбцу,
+    группировка по разделам (в порядке экспорта) и быстрые фильтры.
+
+    Ключ сортировки и строка для текстового поиска считаются один раз
+    на запись и кэшируются до её правки. Добавленные записи встают
+    на место бинарным поиском, удалённые и изменённые — точечно;
+    полная пересборка нужна только при смене сортировки или фильтра.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.sort_column = None
+        self.descending = False
+        self.group = False
+        self.placement = ""
+        self.category = ""
+        self.text = ""
+
+        self._seq = {}        # uid -> порядковый номер (устойчивость сортировки)
+        self._next_seq = 0
+        self._keys = {}       # uid -> ключ сортировки (текущие настройки)
+        self._column_keys = {}  # столбец -> {uid: ключ} — переживает смену сортировки
+        self._haystack = {}   # uid -> текст для поиска
+        self._rows = None     # видимые записи по порядку
+        self._row_keys = None  # их ключи (только в упорядоченном режиме)
+        self.reset(store)
+
+    # ---------- настройки ----------
+
+    def reset(self, store):
+        """Новый проект: кэши пересобираются лениво"""
+        self.store = store
+        self._seq.clear()
+        self._next_seq = 0
+        self._keys.clear()
+        self._column_keys.clear()
+        self._haystack.clear()
+        self._rows = None
+
+    def set_sort(self, column, descending=False):
+        self.sort_column = column
+        self.descending = descending
+        self._keys.clear()
+        self._rows = None
+
+    def set_group(self, group: bool):
+        self.group = group
+        self._keys.clear()
+        self._rows = None
+
+    def set_filters(self, placement="", category="", text=""):
+        text = (text or "").strip().lower()
+        narrowing = (
+            self._rows is not None
+            and placement == self.placement and category == self.category
+            and self.text in text
+        )
+        self.placement, self.category, self.text = placement, category, text
+
+        if narrowing:
+            # запрос стал длиннее — достаточно отсеять уже найденное
+            keep = [i for i, rec in enumerate(self._rows) if self._match_text(rec)]
+            self._rows = [self._rows[i] for i in keep]
+            if self._row_keys is not None:
+                self._row_keys = [self._row_keys[i] for i in keep]
+        else:
+            self._rows = None
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.placement or self.category or self.text)
+
+    @property
+    def ordered(self) -> bool:
+        return self.sort_column is not None or self.group
+
+    # ---------- записи ----------
+
+    def records(self) -> list:
+        if self._rows is None:
+            self._rebuild()
+        return self._rows
+
+    def _rebuild(self):
+        source = self.store.records()
+        for rec in source:
+            self._seq_of(rec)
+        rows = [rec for rec in source if self._match(rec)]
+        if self.ordered:
+            rows.sort(key=self._key)
+            self._row_keys = [self._key(rec) for rec in rows]
+        else:
+            self._row_keys = None
+        self._rows = rows
+
+    def _seq_of(self, rec) -> int:
+        uid = rec["uid"]
+        seq = self._seq.get(uid)
+        if seq is None:
+            seq = self._seq[uid] = self._next_seq
+            self._next_seq += 1
+        return seq
+
+    def _key(self, rec):
+        uid = rec["uid"]
+        key = self._keys.get(uid)
+        if key is None:
+            parts = []
+            if self.group:
+                parts.append(placement_order(rec.get("placement", "")))
+            if self.sort_column is not None:
+                cache = self._column_keys.setdefault(self.sort_column, {})
+                value = cache.get(uid)
+                if value is None:
+                    value = cache[uid] = self._column_key(rec, self.sort_column)
+                parts.append(_Desc(value) if self.descending else value)
+            parts.append(self._seq_of(rec))
+            key = self._keys[uid] = tuple(parts)
+        return key
+
+    @staticmethod
+    def _column_key(rec, column):
+        field = COLUMN_FIELDS.get(column)
+        if field is None:
+            return tuple(_category(rec, f) for f in
+                         ("safety", "durability", "repairability", "loadcap"))
+        if field == "placement":
+            return placement_order(rec.get("placement", ""))
+        return natural_key(str(rec.get(field) or ""))
+
+    def _match_text(self, rec) -> bool:
+        if not self.text:
+            return True
+        uid = rec["uid"]
+        hay = self._haystack.get(uid)
+        if hay is None:
+            hay = self._haystack[uid] = " ".join(
+                str(rec.get(f) or "") for f in TEXT_FIELDS).lower()
+        return all(token in hay for token in self.text.split())
+
+    def _match(self, rec) -> bool:
+        if self.placement and rec.get("placement", "") != self.placement:
+            return False
+        if self.category:
+            field, minimum = CATEGORY_FILTERS[self.category]
+            if _category(rec, field) < minimum:
+                return False
+        return self._match_text(rec)
+
+    # ---------- точечные изменения ----------
+
+    def added(self, records):
+        """Записи добавлены в store (в конец или на прежние места при отмене)"""
+        if self._rows is None:
+            return
+        records = list(records)
+        for rec in records:
+            seq_known = rec["uid"] in self._seq
+            self._seq_of(rec)
+            if not self._match(rec):
+                continue
+            if self.ordered:
+                key = self._key(rec)
+                i = bisect_right(self._row_keys, key)
+                self._rows.insert(i, rec)
+                self._row_keys.insert(i, key)
+            elif not seq_known and self.store.index(rec["uid"]) >= len(self.store) - len(records):
+                self._rows.append(rec)
+            else:
+                # вставка в середину (отмена удаления) — порядок берём из store
+                self._rows = None
+                return
+
+    def removed(self, records):
+        if self._rows is None:
+            return
+        if self.ordered:
+            for rec in records:
+                key = self._keys.get(rec["uid"])
+                if key is None:
+                    continue
+                i = bisect_left(self._row_keys, key)
+                if i < len(self._rows) and self._rows[i] is rec:
+                    del self._rows[i]
+                    del self._row_keys[i]
+        else:
+            gone = {id(rec) for rec in records}
+            self._rows = [rec for rec in self._rows if id(rec) not in gone]
+
+    def updated(self, uids):
+        """Поля записей изменились: пересчитать ключ, фильтр и место"""
+        records = [self.store.get(uid) for uid in uids]
+        records = [rec for rec in records if rec is not None]
+        for rec in records:
+            self._haystack.pop(rec["uid"], None)
+            for cache in self._column_keys.values():
+                cache.pop(rec["uid"], None)
+        if self._rows is None:
+            for rec in records:
+                self._keys.pop(rec["uid"], None)
+            return
+
+        if self.ordered:
+            self.removed(records)
+            for rec in records:
+                self._keys.pop(rec["uid"], None)
+            for rec in records:
+                if self._match(rec):
+                    key = self._key(rec)
+                    i = bisect_right(self._row_keys, key)
+                    self._rows.insert(i, rec)
+                    self._row_keys.insert(i, key)
+        else:
+            shown = {id(rec) for rec in self._rows}
+            if any((id(rec) in shown) != self._match(rec) for rec in records):
+                self._rows = None
@@ -3,7 +3,7 @@ import shutil
 import re
 import os
 import tempfile
-from PIL import Image
+from PIL import Image, ImageOps
 from collections import defaultdict
 
 from docx import Document
@@ -19,6 +19,7 @@ from docx.oxml.ns import qn
 
 from constants import TEMPLATE_PATH, REPORT_TEMPLATE_PATH
 from dictionary import BRIDGE_KEYS
+from condition_rating import ConditionRating
 
 FLOAT_1 = {"hydro_B", "hydro_H", "pier_height"}
 FLOAT_2 = {
@@ -446,6 +447,7 @@ def _prepare_image_for_docx(src_path: str, w_cm: float, h_cm: float, out_dir: st
 
     try:
         img = Image.open(src_path)
+        img = ImageOps.exif_transpose(img)  # ориентация по EXIF
         img = img.convert("RGB")  # JPEG
 
         img = _center_crop_to_ratio(img, target_ratio)
@@ -904,6 +906,8 @@ def export_to_docx(file_path: str, project: dict):
     # ---------- Форма 1 (Основные сведения bridge.*) ----------
     bridge = project.get("bridge", {})
     mapping = prepare_bridge_mapping(bridge)
+    # оценка технического состояния по категориям дефектов
+    mapping.update(ConditionRating(project.get("defects", [])).mapping())
     replace_placeholders_everywhere(doc, mapping)
 
     # ---------- Форма 2 (Пролётные строения spans.*) ----------
@@ -1007,7 +1011,9 @@ def export_report_to_docx(file_path: str, project: dict):
 
     # --- bridge.* ---
     bridge = project.get("bridge", {})
-    replace_placeholders_everywhere(doc, prepare_bridge_mapping_report(bridge))
+    mapping = prepare_bridge_mapping_report(bridge)
+    mapping.update(ConditionRating(project.get("defects", [])).mapping())
+    replace_placeholders_everywhere(doc, mapping)
 
     # --- span0/span1/... ---
     spans = project.get("spans", [])
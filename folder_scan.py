@@ -0,0 +1,78 @@
+# folder_scan.py
+import os
+import threading
+
+from thumbnail_cache import PHOTO_EXTENSIONS
+
+
+class FolderScanner:
+    """
+    Список файлов папки (os.scandir) с кэшем: повторный запрос стоит
+    одного stat на каталог — листинг перечитывается, только если
+    у папки (или у подпапки при recursive) сменился mtime, т.е. файлы
+    добавлены, удалены или переименованы. Имена — относительные пути
+    через «/», отсортированы без учёта регистра.
+    """
+
+    def __init__(self, extensions=PHOTO_EXTENSIONS):
+        self.extensions = tuple(extensions)
+        self._cache = {}  # (папка, recursive) -> ({каталог: mtime_ns}, [файлы])
+        self._lock = threading.Lock()
+
+    def list(self, folder: str, recursive: bool = False) -> list:
+        if not folder or not os.path.isdir(folder):
+            return []
+        key = (os.path.abspath(folder), recursive)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and self._unchanged(cached[0]):
+            return list(cached[1])
+
+        dirs, files = {}, []
+        self._scan(key[0], "", recursive, dirs, files)
+        files.sort(key=lambda s: s.lower())
+        with self._lock:
+            self._cache[key] = (dirs, files)
+        return list(files)
+
+    def invalidate(self, folder: str = None):
+        """Сбросить кэш папки (или весь) — например, после записи в неё файла"""
+        with self._lock:
+            if folder is None:
+                self._cache.clear()
+                return
+            path = os.path.abspath(folder)
+            for key in [k for k in self._cache if k[0] == path]:
+                del self._cache[key]
+
+    @staticmethod
+    def _unchanged(dirs: dict) -> bool:
+        for path, mtime in dirs.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _scan(self, path: str, prefix: str, recursive: bool, dirs: dict, files: list):
+        try:
+            dirs[path] = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    if entry.name.lower().endswith(self.extensions):
+                        files.append(prefix + entry.name)
+                elif recursive and entry.is_dir(follow_symlinks=False) \
+                        and not entry.name.startswith("."):
+                    self._scan(entry.path, f"{prefix}{entry.name}/", recursive, dirs, files)
+            except OSError:
+                continue
+
+
+# общий сканер для вкладки фото, сетки миниатюр и просмотрщика
+photo_scanner = FolderScanner()
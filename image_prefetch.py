@@ -0,0 +1,180 @@
+# image_prefetch.py
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+
+def image_bytes(img) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def fit_size(size, box, upscale: bool = False) -> tuple:
+    """Размер, вписанный в box с сохранением пропорций (увеличение — только при upscale)"""
+    w, h = size
+    scale = min(box[0] / w, box[1] / h)
+    if not upscale:
+        scale = min(scale, 1.0)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def build_pyramid(img, min_side: int = 256) -> list:
+    """Исходник и его уменьшенные вдвое копии — от большей к меньшей"""
+    levels = [img]
+    while min(levels[-1].size) // 2 >= min_side:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+def pick_level(levels, size):
+    """Наименьший уровень пирамиды, из которого ещё можно получить size без увеличения"""
+    for level in reversed(levels):
+        if level.width >= size[0] and level.height >= size[1]:
+            return level
+    return levels[0]
+
+
+class ImageLRU:
+    """LRU уменьшенных изображений с ограничением по объёму в байтах"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._items = OrderedDict()  # ключ -> Image
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            img = self._items.get(key)
+            if img is not None:
+                self._items.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        size = image_bytes(img)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.used -= image_bytes(old)
+            self._items[key] = img
+            self.used += size
+            while self.used > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self.used -= image_bytes(dropped)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.used = 0
+
+
+class ImagePrefetcher:
+    """
+    Фоновое чтение фотографий для просмотрщика: файл декодируется
+    и уменьшается до размера экрана в рабочем потоке, результат
+    кладётся в ImageLRU. Соседние снимки читаются заранее, поэтому
+    листание стрелками берёт готовое изображение из памяти.
+
+    Ключ — (путь, mtime, размер файла): заменённый файл читается заново.
+    Готовые загрузки приходят в results как (путь, Image или None, final):
+    для текущего снимка сначала приходит грубое превью (final=False),
+    затем изображение под экран. JPEG декодируется сразу в уменьшенном
+    масштабе (draft), так что полноразмерные пиксели в памяти не лежат.
+    """
+
+    def __init__(self, box, max_mb: int = 256, workers: int = 2):
+        self.box = box  # (ширина, высота) экрана
+        self.cache = ImageLRU(max_mb * 1024 * 1024)
+        self.results = queue.Queue()
+        self._pending = {}  # путь -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="viewer")
+
+    @staticmethod
+    def _key(path: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return path, st.st_mtime_ns, st.st_size
+
+    def get(self, path: str):
+        key = self._key(path)
+        return None if key is None else self.cache.get(key)
+
+    def request(self, paths, preview: bool = False):
+        """
+        Загрузить paths (первый — текущий снимок, дальше соседи).
+        preview — для первого снимка сначала прислать грубое превью.
+        Задачи для путей, которых больше нет в списке, снимаются.
+        """
+        paths = list(paths)
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in paths and future.cancel():
+                    del self._pending[path]
+            for i, path in enumerate(paths):
+                if path in self._pending:
+                    continue
+                key = self._key(path)
+                if key is None or key in self.cache:
+                    continue
+                self._pending[path] = self._pool.submit(
+                    self._work, path, key, preview and i == 0)
+
+    def poll(self) -> list:
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending) or not self.results.empty()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.cache.clear()
+
+    # ---------- рабочий поток ----------
+
+    def _work(self, path: str, key, preview: bool = False):
+        if preview:
+            try:
+                img = self.decode(path, scale=4)
+            except Exception:
+                img = None
+            if img is not None:
+                self.results.put((path, img, False))
+        try:
+            img = self.decode(path)
+            self.cache.put(key, img)
+        except Exception:
+            img = None
+        with self._lock:
+            self._pending.pop(path, None)
+        self.results.put((path, img, True))
+
+    def decode(self, path: str, scale: int = 1):
+        """Файл -> RGB-изображение не больше экрана (превью — в scale раз меньше)"""
+        box = (max(1, self.box[0] // scale), max(1, self.box[1] // scale))
+        with Image.open(path) as src:
+            # JPEG: декодер сам уменьшает в 2/4/8 раз, но не меньше box
+            src.draft("RGB", box)
+            # поворот по тегу Orientation — снимок «на боку» показываем стоя
+            img = ImageOps.exif_transpose(src).convert("RGB")
+        if img.width > box[0] or img.height > box[1]:
+            img.thumbnail(box, Image.BILINEAR if scale > 1 else Image.LANCZOS)
+        return img
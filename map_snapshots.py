@@ -0,0 +1,196 @@
+# map_snapshots.py
+import hashlib
+import io
+import logging
+import os
+
+from PIL import Image, ImageDraw
+
+from constants import MAPS_DIR, MAPS_LOCAL_DIR
+
+DEFAULT_ZOOM = 15
+DEFAULT_SIZE = (650, 450)
+
+# поставщик по умолчанию; "local" — без сети (офлайн и проверки)
+DEFAULT_PROVIDER = "yandex"
+PROVIDER_ENV = "BRIDGE_REPTOOL_MAP_PROVIDER"
+
+log = logging.getLogger(__name__)
+
+
+def parse_coord(coord: str) -> tuple:
+    """«55.75, 37.61» -> (55.75, 37.61); ValueError, если не разобрать"""
+    parts = [p.strip() for p in (coord or "").split(",")]
+    if len(parts) != 2:
+        raise ValueError("Координаты задаются как «широта, долгота»")
+    lat, lon = float(parts[0]), float(parts[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("Координаты вне допустимого диапазона")
+    return lat, lon
+
+
+# ---------- поставщики карт ----------
+
+PROVIDERS = {}
+
+
+def map_provider(name: str):
+    """Регистрирует класс поставщика под именем"""
+    def decorator(cls):
+        cls.name = name
+        PROVIDERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_provider(name: str = None):
+    """
+    Поставщик по имени (по умолчанию — из переменной окружения).
+    Неизвестное имя не мешает запуску: берётся поставщик по умолчанию.
+    """
+    name = name or os.environ.get(PROVIDER_ENV) or DEFAULT_PROVIDER
+    if name not in PROVIDERS:
+        log.warning("Неизвестный поставщик карт %r, используется %r",
+                    name, DEFAULT_PROVIDER)
+        name = DEFAULT_PROVIDER
+    return PROVIDERS[name]()
+
+
+def placeholder_map(lat: float, lon: float, zoom: int, size) -> bytes:
+    """Схема-заглушка с меткой и координатами — когда настоящей карты нет"""
+    w, h = size
+    img = Image.new("RGB", (w, h), (238, 236, 228))
+    draw = ImageDraw.Draw(img)
+    for x in range(0, w, 50):
+        draw.line([(x, 0), (x, h)], fill=(220, 218, 210))
+    for y in range(0, h, 50):
+        draw.line([(0, y), (w, y)], fill=(220, 218, 210))
+    cx, cy = w // 2, h // 2
+    draw.ellipse([cx - 8, cy - 8, cx + 8, cy + 8], fill=(200, 30, 30))
+    draw.text((10, h - 20), f"{lat:.6f}, {lon:.6f}  z{zoom}", fill=(60, 60, 60))
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+@map_provider("yandex")
+class YandexStaticProvider:
+    """Static API Яндекс.Карт: PNG с меткой в точке моста"""
+
+    URL = "https://static-maps.yandex.ru/1.x/"
+
+    def fetch(self, lat: float, lon: float, zoom: int, size) -> bytes:
+        import requests
+        import certifi
+
+        url = (
+            f"{self.URL}"
+            f"?ll={lon},{lat}"
+            f"&z={zoom}"
+            f"&size={size[0]},{size[1]}"
+            "&l=map"
+            f"&pt={lon},{lat},pm2rdm"
+        )
+        r = requests.get(url, timeout=20, verify=certifi.where())
+        r.raise_for_status()
+        return r.content
+
+
+@map_provider("local")
+class LocalFileProvider:
+    """
+    Карты без сети: файл «<широта>_<долгота>.png» из APP_DATA_DIR/maps_local
+    (например, заранее сохранённый скриншот). Если файла нет, fetch
+    возвращает None — вместо карты будет заглушка. Подходит для работы
+    офлайн и для проверок.
+    """
+
+    def __init__(self, folder: str = MAPS_LOCAL_DIR):
+        self.folder = folder
+
+    def fetch(self, lat: float, lon: float, zoom: int, size):
+        path = os.path.join(self.folder, f"{lat:.6f}_{lon:.6f}.png")
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+
+# ---------- кэш ----------
+
+class MapSnapshots:
+    """
+    Снимки карт с кэшем на диске (APP_DATA_DIR/maps): ключ — поставщик,
+    координаты (до 6 знаков), масштаб и размер. Повторный запрос для тех
+    же координат сеть не трогает. Методы блокирующие — вызывать из
+    фонового потока.
+    """
+
+    def __init__(self, provider=None, cache_dir: str = MAPS_DIR):
+        self.provider = provider or get_provider()
+        self.cache_dir = cache_dir
+
+    def cache_path(self, lat, lon, zoom=DEFAULT_ZOOM, size=DEFAULT_SIZE) -> str:
+        raw = f"{self.provider.name}|{lat:.6f}|{lon:.6f}|{zoom}|{size[0]}x{size[1]}"
+        key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".png")
+
+    def is_cached(self, lat, lon, zoom=DEFAULT_ZOOM, size=DEFAULT_SIZE) -> bool:
+        return os.path.isfile(self.cache_path(lat, lon, zoom, size))
+
+    def get(self, lat, lon, zoom=DEFAULT_ZOOM, size=DEFAULT_SIZE) -> bytes:
+        """Карта из кэша или от поставщика; если карты нет — заглушка"""
+        data = self.fetch(lat, lon, zoom, size)
+        if data is None:
+            # заглушку не кэшируем: когда карта появится, возьмём настоящую
+            return placeholder_map(lat, lon, zoom, size)
+        return data
+
+    def fetch(self, lat, lon, zoom=DEFAULT_ZOOM, size=DEFAULT_SIZE):
+        """Настоящая карта (из кэша или от поставщика) или None"""
+        path = self.cache_path(lat, lon, zoom, size)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            pass
+
+        data = self.provider.fetch(lat, lon, zoom, size)
+        if data is None:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return data
+
+    def pregenerate(self, coords, progress=None, cancel=None) -> dict:
+        """
+        Заранее кладёт в кэш карты для списка координат (строки Формы 1).
+        progress(done, total); cancel() -> True прерывает обход.
+        """
+        points = []
+        for coord in coords:
+            try:
+                point = parse_coord(coord)
+            except ValueError:
+                continue
+            if point not in points:
+                points.append(point)
+
+        result = {"fetched": 0, "cached": 0, "failed": 0, "total": len(points)}
+        for i, (lat, lon) in enumerate(points):
+            if cancel is not None and cancel():
+                break
+            if self.is_cached(lat, lon):
+                result["cached"] += 1
+            else:
+                try:
+                    fetched = self.fetch(lat, lon) is not None
+                except Exception:
+                    fetched = False
+                result["fetched" if fetched else "failed"] += 1
+            if progress is not None:
+                progress(i + 1, len(points))
+        return result
@@ -0,0 +1,140 @@
+# photo_metadata.py
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from constants import PHOTO_META_DIR
+
+# теги EXIF
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+IFD_EXIF = 0x8769
+IFD_GPS = 0x8825
+GPS_LAT_REF, GPS_LAT, GPS_LON_REF, GPS_LON = 1, 2, 3, 4
+
+EMPTY_META = {"time": "", "orientation": 1, "lat": None, "lon": None}
+
+
+def _dms_to_degrees(dms, ref):
+    try:
+        d, m, s = (float(x) for x in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    value = d + m / 60 + s / 3600
+    if str(ref).upper() in ("S", "W"):
+        value = -value
+    return round(value, 6)
+
+
+def read_photo_meta(path: str) -> dict:
+    """
+    Дата съёмки, ориентация и GPS из заголовка EXIF.
+    Image.open читает только заголовок — пиксели не декодируются.
+    """
+    meta = dict(EMPTY_META)
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+    except Exception:
+        return meta
+    if not exif:
+        return meta
+
+    try:
+        meta["orientation"] = int(exif.get(TAG_ORIENTATION, 1) or 1)
+    except (TypeError, ValueError):
+        pass
+
+    sub = exif.get_ifd(IFD_EXIF)
+    meta["time"] = str(sub.get(TAG_DATETIME_ORIGINAL) or exif.get(TAG_DATETIME) or "").strip()
+
+    gps = exif.get_ifd(IFD_GPS)
+    if GPS_LAT in gps and GPS_LON in gps:
+        lat = _dms_to_degrees(gps[GPS_LAT], gps.get(GPS_LAT_REF, "N"))
+        lon = _dms_to_degrees(gps[GPS_LON], gps.get(GPS_LON_REF, "E"))
+        if lat is not None and lon is not None and (lat or lon):
+            meta["lat"], meta["lon"] = lat, lon
+    return meta
+
+
+class PhotoMetaIndex:
+    """
+    Кэш EXIF по папке: APP_DATA_DIR/photo_meta/<хэш папки>.json,
+    запись на файл — [mtime_ns, размер, meta]. При повторном открытии
+    перечитываются только новые и изменённые файлы, и те — параллельно.
+    """
+
+    def __init__(self, cache_dir: str = PHOTO_META_DIR, workers: int = 8):
+        self.cache_dir = cache_dir
+        self.workers = workers
+
+    def _cache_path(self, folder: str) -> str:
+        key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _load(self, folder: str) -> dict:
+        try:
+            with open(self._cache_path(folder), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, folder: str, entries: dict):
+        path = self._cache_path(folder)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def scan(self, folder: str, files) -> dict:
+        """{имя файла: meta} для files из folder (вызывать не из потока Tk)"""
+        cached = self._load(folder)
+        entries, stale = {}, []
+        for name in files:
+            try:
+                st = os.stat(os.path.join(folder, name))
+            except OSError:
+                continue
+            stamp = [st.st_mtime_ns, st.st_size]
+            entry = cached.get(name)
+            if entry and entry[:2] == stamp:
+                entries[name] = entry
+            else:
+                stale.append((name, stamp))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                metas = pool.map(lambda item: read_photo_meta(os.path.join(folder, item[0])),
+                                 stale)
+                for (name, stamp), meta in zip(stale, metas):
+                    entries[name] = stamp + [meta]
+        if stale or len(entries) != len(cached):
+            self._save(folder, entries)
+        return {name: entry[2] for name, entry in entries.items()}
+
+
+def sort_by_time(files, meta: dict) -> list:
+    """Снимки с датой — по времени съёмки, без даты — в конце по имени"""
+    def key(name):
+        t = (meta.get(name) or EMPTY_META)["time"]
+        return (0, t, name.lower()) if t else (1, "", name.lower())
+    return sorted(files, key=key)
+
+
+def gps_center(meta: dict):
+    """Средняя точка снимков с GPS -> (широта, долгота) или None"""
+    points = [(m["lat"], m["lon"]) for m in meta.values()
+              if m and m.get("lat") is not None and m.get("lon") is not None]
+    if not points:
+        return None
+    lat = sum(p[0] for p in points) / len(points)
+    lon = sum(p[1] for p in points) / len(points)
+    return round(lat, 6), round(lon, 6)
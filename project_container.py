@@ -0,0 +1,403 @@
+# project_container.py
+import bisect
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from defect_store import DefectStore
+
+BDRT_SUFFIX = ".bdrt"
+CONTAINER_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS bridge (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS spans (
+    key TEXT PRIMARY KEY,
+    pos REAL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS piers (
+    key TEXT PRIMARY KEY,
+    pos REAL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS defects (
+    key TEXT PRIMARY KEY,
+    pos REAL,
+    uid TEXT,
+    placement TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_defects_uid ON defects(uid);
+CREATE INDEX IF NOT EXISTS idx_defects_placement ON defects(placement);
+CREATE INDEX IF NOT EXISTS idx_defects_pos ON defects(pos);
+CREATE TABLE IF NOT EXISTS photos (
+    key TEXT PRIMARY KEY,
+    pos REAL,
+    data TEXT
+);
+"""
+
+# списки проекта, которые хранятся построчно
+LIST_TABLES = ("spans", "piers", "defects")
+# минимальный зазор между соседними позициями; меньше — перенумеровываем
+POS_EPSILON = 1e-6
+# сколько дефектов читается за одну порцию при ленивой загрузке
+DEFECT_PAGE_SIZE = 500
+# служебные ключи meta (не ключи проекта)
+VERSION_KEY = "__version"
+ORDER_KEY = "__order"
+
+
+def _dump(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _row_keys(items: list) -> list:
+    """
+    Ключ строки — uid записи; у записей без uid (или с повтором uid)
+    ключ строится по позиции, чтобы сохранить их без потерь.
+    """
+    keys = []
+    seen = set()
+    for i, item in enumerate(items):
+        uid = item.get("uid") if isinstance(item, dict) else None
+        key = uid if isinstance(uid, str) and uid and uid not in seen else f"#{i}"
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+
+def _positions(keys: list, old: dict) -> list:
+    """
+    Позиции строк для нового порядка keys. Строки, которые остались
+    в прежнем порядке, сохраняют старую позицию; новым и переставленным
+    даются промежуточные значения — так удаление или вставка в середине
+    не заставляет переписывать все последующие строки.
+    """
+    n = len(keys)
+    old_pos = [
+        old[key][0] if key in old and old[key][0] is not None else None
+        for key in keys
+    ]
+
+    # наибольшая возрастающая подпоследовательность старых позиций — их не трогаем
+    tails, tail_idx, parent = [], [], [None] * n
+    for i, pos in enumerate(old_pos):
+        if pos is None:
+            continue
+        k = bisect.bisect_left(tails, pos)
+        parent[i] = tail_idx[k - 1] if k > 0 else None
+        if k == len(tails):
+            tails.append(pos)
+            tail_idx.append(i)
+        else:
+            tails[k] = pos
+            tail_idx[k] = i
+
+    result = [None] * n
+    i = tail_idx[-1] if tail_idx else None
+    while i is not None:
+        result[i] = old_pos[i]
+        i = parent[i]
+
+    i = 0
+    while i < n:
+        if result[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < n and result[j] is None:
+            j += 1
+        lo = result[i - 1] if i > 0 else None
+        hi = result[j] if j < n else None
+        count = j - i
+        for k in range(count):
+            if lo is None and hi is None:
+                result[i + k] = float(k)
+            elif hi is None:
+                result[i + k] = lo + k + 1
+            elif lo is None:
+                result[i + k] = hi - (count - k)
+            else:
+                result[i + k] = lo + (hi - lo) * (k + 1) / (count + 1)
+        i = j
+
+    # середины между соседями рано или поздно упираются в точность float —
+    # тогда позиции раздаются заново целыми (таблица переписывается один раз)
+    if any(b - a < POS_EPSILON for a, b in zip(result, result[1:])):
+        result = [float(k) for k in range(n)]
+    return result
+
+
+class ProjectContainer:
+    """
+    Проект в формате .bdrt — SQLite с таблицами bridge / spans / piers /
+    defects / photos. Каждая запись хранится отдельной строкой (JSON),
+    поэтому сохранение записывает на диск только изменившиеся строки.
+
+    Дефекты можно не читать сразу (load_project(lazy_defects=True)) —
+    тогда они догружаются порциями через iter_defects(). Строки дефектов
+    при сохранении сериализуются только для записей, которые DefectStore
+    пометил изменёнными, остальным при необходимости меняется лишь pos.
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        # открывается в фоновом потоке загрузки, дальше работает в потоке UI
+        if read_only:
+            # чужой файл в общей папке: без блокировок на запись и без SCHEMA
+            uri = Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.executescript(SCHEMA)
+        # последнее сохранённое состояние: таблица -> {key: (pos, data)};
+        # у дефектов data не хранится (None) — их изменения отмечает store
+        self._saved = None
+        # DefectStore, состояние которого совпадает с таблицей defects
+        self._synced_store = None
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- чтение ----------
+
+    def _load_saved(self) -> dict:
+        saved = {}
+        for table in ("meta", "bridge"):
+            saved[table] = {
+                key: (None, value) for key, value in
+                self.conn.execute(f"SELECT key, value FROM {table}")
+            }
+        saved["defects"] = {
+            key: (pos, None) for key, pos in
+            self.conn.execute("SELECT key, pos FROM defects")
+        }
+        for table in ("spans", "piers", "photos"):
+            saved[table] = {
+                key: (pos, data) for key, pos, data in
+                self.conn.execute(f"SELECT key, pos, data FROM {table}")
+            }
+        return saved
+
+    def load_bridge(self) -> dict:
+        return {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM bridge")
+        }
+
+    def load_items(self, table: str) -> list:
+        """Пролёты / опоры / дефекты целиком, в исходном порядке"""
+        return [
+            json.loads(data) for (data,) in
+            self.conn.execute(f"SELECT data FROM {table} ORDER BY pos")
+        ]
+
+    def count_defects(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM defects").fetchone()[0]
+
+    def iter_defects(self, page_size: int = DEFECT_PAGE_SIZE):
+        """Дефекты в исходном порядке порциями по page_size записей"""
+        cursor = self.conn.execute("SELECT data FROM defects ORDER BY pos")
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield [json.loads(data) for (data,) in rows]
+
+    def load_photos(self):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'photos'"
+        ).fetchone()
+        if row is None:
+            return None
+        photos = json.loads(row[0])
+        if isinstance(photos, dict):
+            photos["gallery"] = self.load_items("photos")
+        return photos
+
+    def load_project(self, lazy_defects: bool = False) -> dict:
+        """
+        Собирает проект в том же виде, что и load_json. С lazy_defects
+        дефекты не читаются: project["defects"] — пустой DefectStore,
+        который заполняется порциями из iter_defects().
+        """
+        meta = {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM meta")
+        }
+        if meta.get(VERSION_KEY, CONTAINER_VERSION) > CONTAINER_VERSION:
+            raise ValueError("Проект сохранён более новой версией программы")
+
+        project = {
+            k: v for k, v in meta.items()
+            if k not in (VERSION_KEY, ORDER_KEY, "photos")
+        }
+
+        project["bridge"] = self.load_bridge()
+        for table in ("spans", "piers"):
+            project[table] = self.load_items(table)
+        if lazy_defects:
+            project["defects"] = self._synced_store = DefectStore()
+        else:
+            project["defects"] = self.load_items("defects")
+        photos = self.load_photos()
+        if photos is not None:
+            project["photos"] = photos
+
+        # исходный порядок ключей верхнего уровня
+        keys = meta.get(ORDER_KEY) or []
+        project = {k: project[k] for k in keys if k in project} | project
+
+        self._saved = self._load_saved()
+        return project
+
+    # ---------- запись ----------
+
+    def _project_rows(self, project: dict) -> dict:
+        rows = {"meta": {}, "bridge": {}}
+
+        for key, value in project.items():
+            if key in ("bridge", "photos") + LIST_TABLES:
+                continue
+            rows["meta"][key] = (None, _dump(value))
+        rows["meta"][VERSION_KEY] = (None, _dump(CONTAINER_VERSION))
+        rows["meta"][ORDER_KEY] = (None, _dump(list(project.keys())))
+
+        for key, value in (project.get("bridge") or {}).items():
+            rows["bridge"][key] = (None, _dump(value))
+
+        for table in ("spans", "piers"):
+            rows[table] = self._list_rows(table, project.get(table) or [])
+
+        photos = project.get("photos")
+        gallery = []
+        if isinstance(photos, dict):
+            gallery = photos.get("gallery") or []
+            head = {k: v for k, v in photos.items() if k != "gallery"}
+            rows["meta"]["photos"] = (None, _dump(head))
+        elif photos is not None:
+            rows["meta"]["photos"] = (None, _dump(photos))
+        rows["photos"] = self._list_rows("photos", gallery)
+        return rows
+
+    def _list_rows(self, table: str, items: list) -> dict:
+        keys = _row_keys(items)
+        positions = _positions(keys, self._saved.get(table, {}))
+        return {
+            key: (pos, _dump(item))
+            for key, pos, item in zip(keys, positions, items)
+        }
+
+    def _defect_rows(self, defects):
+        """
+        -> ({key: (pos, None)}, [строки для записи]). Сериализуются только
+        новые, переставленные и изменённые записи; если store не тот,
+        что был загружен/сохранён этим контейнером, — все.
+        """
+        items = defects.records() if isinstance(defects, DefectStore) else list(defects)
+        old = self._saved.get("defects", {})
+        keys = _row_keys(items)
+        positions = _positions(keys, old)
+
+        synced = isinstance(defects, DefectStore) and defects is self._synced_store
+        dirty = defects.dirty_uids() if synced else None
+
+        rows, upserts = {}, []
+        for key, pos, item in zip(keys, positions, items):
+            rows[key] = (pos, None)
+            if synced and key in old and old[key][0] == pos and key not in dirty:
+                continue
+            uid, placement = (item.get("uid"), item.get("placement")) \
+                if isinstance(item, dict) else (None, None)
+            upserts.append((key, pos, uid, placement, _dump(item)))
+        return rows, upserts
+
+    def save_project(self, project: dict) -> int:
+        """
+        Сохраняет проект, записывая только изменившиеся строки.
+        Возвращает число вставленных/обновлённых/удалённых строк.
+        """
+        if self._saved is None:
+            self._saved = self._load_saved()
+
+        project = dict(project)
+        project["saved_at"] = datetime.now().isoformat()
+        new_rows = self._project_rows(project)
+        defects = project.get("defects") or []
+        defect_rows, defect_upserts = self._defect_rows(defects)
+        changed = 0
+
+        with self.conn:
+            for table, rows in new_rows.items():
+                old = self._saved.get(table, {})
+
+                removed = [(k,) for k in old.keys() - rows.keys()]
+                if removed:
+                    self.conn.executemany(f"DELETE FROM {table} WHERE key = ?", removed)
+                    changed += len(removed)
+
+                upserts = [(k, pos, data) for k, (pos, data) in rows.items()
+                           if old.get(k) != (pos, data)]
+                if not upserts:
+                    continue
+                changed += len(upserts)
+
+                if table in ("meta", "bridge"):
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)",
+                        [(k, data) for k, _, data in upserts]
+                    )
+                else:
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} (key, pos, data) VALUES (?, ?, ?)",
+                        upserts
+                    )
+
+            old = self._saved.get("defects", {})
+            removed = [(k,) for k in old.keys() - defect_rows.keys()]
+            if removed:
+                self.conn.executemany("DELETE FROM defects WHERE key = ?", removed)
+                changed += len(removed)
+            if defect_upserts:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO defects (key, pos, uid, placement, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    defect_upserts
+                )
+                changed += len(defect_upserts)
+
+        self._saved = new_rows
+        self._saved["defects"] = defect_rows
+        if isinstance(defects, DefectStore):
+            defects.mark_clean()
+            self._synced_store = defects
+        return changed
+
+
+def save_bdrt(path: str, project: dict):
+    container = ProjectContainer(path)
+    try:
+        container.save_project(project)
+    finally:
+        container.close()
+
+
+def load_bdrt(path: str) -> dict:
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    container = ProjectContainer(path, read_only=True)
+    try:
+        return container.load_project()
+    finally:
+        container.close()
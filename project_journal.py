@@ -0,0 +1,256 @@
+# project_journal.py
+import json
+import os
+import queue
+import threading
+
+from defect_store import DefectStore
+from project_storage import load_json, write_atomic
+
+JOURNAL_SUFFIX = ".journal"
+SNAPSHOT_SUFFIX = ".recovery"
+
+
+def journal_path_for(project_path: str) -> str:
+    return project_path + JOURNAL_SUFFIX
+
+
+def snapshot_path_for(project_path: str) -> str:
+    return project_path + SNAPSHOT_SUFFIX
+
+
+def read_snapshot(project_path: str):
+    """Снимок проекта, в который свёрнут журнал (или None, если его нет)"""
+    path = snapshot_path_for(project_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        return load_json(path)
+    except Exception:
+        return None
+
+
+def read_journal(path) -> list:
+    """Читает журнал правок (JSON Lines). Недописанный хвост после сбоя отбрасывается."""
+    entries = []
+    if not path or not os.path.isfile(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
+
+
+def replay_journal(project: dict, entries: list) -> int:
+    """
+    Применяет записи журнала к проекту (после load_json или пустого проекта).
+    Возвращает число применённых записей.
+    """
+    defects = project.get("defects")
+    if not isinstance(defects, DefectStore):
+        defects = project["defects"] = DefectStore(defects or [])
+
+    for e in entries:
+        op = e.get("op")
+
+        if op == "defect_add":
+            rec = e["rec"]
+            # запись могла попасть в файл до сбоя — не дублируем
+            if rec.get("uid") not in defects:
+                defects.add(rec, e.get("index"))
+
+        elif op == "defect_add_many":
+            defects.insert_many([
+                (index, rec) for index, rec in e.get("items", [])
+                if rec.get("uid") not in defects
+            ])
+
+        elif op == "defect_update":
+            defects.update(e.get("uid"), e.get("fields", {}))
+
+        elif op == "defect_update_many":
+            defects.update_many(e.get("changes", {}))
+
+        elif op == "defect_delete":
+            defects.remove(e.get("uids", []))
+
+        elif op == "bridge_set":
+            project.setdefault("bridge", {})[e["key"]] = e.get("value", "")
+
+        elif op == "item_add":
+            items = project.setdefault(e["section"], [])
+            uid = e["item"].get("uid")
+            if uid and any(x.get("uid") == uid for x in items):
+                continue  # лист уже есть в файле (сохранён до сбоя)
+            index = e.get("index")
+            if index is None or index >= len(items):
+                items.append(e["item"])
+            else:
+                items.insert(index, e["item"])
+
+        elif op == "item_set":
+            for item in project.setdefault(e["section"], []):
+                if item.get("uid") == e.get("uid"):
+                    item[e["key"]] = e.get("value", "")
+                    break
+
+        elif op == "item_delete":
+            project[e["section"]] = [
+                x for x in project.get(e["section"], []) if x.get("uid") != e.get("uid")
+            ]
+
+        elif op == "photos_set":
+            project["photos"] = e["photos"]
+
+        elif op == "photos_field":
+            project.setdefault("photos", {})[e["key"]] = e.get("value")
+
+        elif op == "gallery_add":
+            gallery = project.setdefault("photos", {}).setdefault("gallery", [])
+            rec = e["rec"]
+            if any(r.get("uid") == rec.get("uid") for r in gallery):
+                continue  # запись уже есть в файле
+            index = e.get("index")
+            if index is None or index >= len(gallery):
+                gallery.append(rec)
+            else:
+                gallery.insert(index, rec)
+
+        elif op == "gallery_set":
+            for rec in project.get("photos", {}).get("gallery", []):
+                if rec.get("uid") == e.get("uid"):
+                    rec.update(e.get("fields", {}))
+                    break
+
+        elif op == "gallery_delete":
+            photos = project.get("photos")
+            if photos:
+                photos["gallery"] = [
+                    r for r in photos.get("gallery", []) if r.get("uid") != e.get("uid")
+                ]
+
+    return len(entries)
+
+
+class ProjectJournal:
+    """
+    Журнал правок проекта с фоновой записью.
+
+    record() только ставит строку в очередь (JSON готовится сразу, в потоке UI),
+    фоновый поток раз в flush_interval секунд дописывает очередь в
+    <проект>.journal. compact() атомарно записывает готовый JSON проекта
+    (encode_project) в снимок <проект>.recovery и обнуляет журнал — в той же
+    очереди, поэтому порядок правок не теряется. Сам файл проекта журнал
+    не трогает: он меняется только при явном сохранении.
+    """
+
+    def __init__(self, flush_interval: float = 3.0):
+        self.flush_interval = flush_interval
+        self.pending_since_compact = 0
+        self.last_error = None
+
+        self._queue = queue.Queue()
+        self._project_path = None
+        self._journal_path = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # --- API для потока UI ---
+
+    def open(self, project_path: str):
+        """
+        Переключает журнал на проект project_path. Журнал и снимок
+        предыдущего проекта удаляются.
+        """
+        self.pending_since_compact = 0
+        self._queue.put(("open", project_path))
+
+    def record(self, op: str, **data):
+        data["op"] = op
+        self._queue.put(("line", json.dumps(data, ensure_ascii=False)))
+        self.pending_since_compact += 1
+
+    def compact(self, project_raw: bytes):
+        self.pending_since_compact = 0
+        self._queue.put(("compact", project_raw))
+
+    def discard(self):
+        """Удаляет журнал и снимок текущего проекта (данные сохранены или отброшены)"""
+        self.pending_since_compact = 0
+        self._queue.put(("discard",))
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    # --- фоновый поток ---
+
+    def _run(self):
+        while True:
+            stopping = self._stop.wait(self.flush_interval)
+            try:
+                self._drain()
+            except OSError as e:
+                self.last_error = e
+            if stopping:
+                return
+
+    def _drain(self):
+        lines = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item[0] == "line":
+                lines.append(item[1])
+                continue
+
+            self._append(lines)
+            lines = []
+
+            if item[0] == "open":
+                self._remove_journal()
+                self._remove_snapshot()
+                self._project_path = item[1]
+                self._journal_path = journal_path_for(item[1])
+                self._remove_journal()
+                self._remove_snapshot()
+            elif item[0] == "compact":
+                self._write_snapshot(item[1])
+                self._remove_journal()
+            elif item[0] == "discard":
+                self._remove_journal()
+                self._remove_snapshot()
+
+        self._append(lines)
+
+    def _append(self, lines):
+        if not lines or not self._journal_path:
+            return
+        with open(self._journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, raw):
+        if self._project_path:
+            write_atomic(snapshot_path_for(self._project_path), raw)
+
+    def _remove_snapshot(self):
+        if self._project_path:
+            path = snapshot_path_for(self._project_path)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _remove_journal(self):
+        if self._journal_path and os.path.exists(self._journal_path):
+            os.remove(self._journal_path)
@@ -1,11 +1,12 @@
 #project_model.py
+from defect_store import DefectStore
 
 def make_empty_project():
     return {
         "bridge": {}, #Form 1
         "spans": [], #Form 2
         "piers": [], #Form 3
-        "defects": [], #Form 5
+        "defects": DefectStore(), #Form 5
         "photos": { #Photos
             "folder": "",
             "cover": {
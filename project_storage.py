@@ -1,21 +1,141 @@
 #project_storage.py
+import gzip
 import json
+import os
+import shutil
+import tempfile
 from datetime import datetime
 
-def save_json(path, project: dict):
+from defect_store import DefectStore
+from project_container import BDRT_SUFFIX, load_bdrt
+
+# необязательные ускорители: быстрый JSON и сжатие zstd
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_SUFFIX = ".json.gz"
+ZSTD_SUFFIX = ".json.zst"
+
+# umask процесса читается один раз: os.umask() меняет его для всех потоков
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def project_suffixes() -> tuple:
+    """Расширения файлов проекта, которые умеет читать и писать load_json/save_json"""
+    if zstandard is not None:
+        return (".json", GZIP_SUFFIX, ZSTD_SUFFIX)
+    return (".json", GZIP_SUFFIX)
+
+
+def is_project_file(path: str) -> bool:
+    return path.lower().endswith(project_suffixes())
+
+
+def encode_project(project: dict, compact: bool = False) -> bytes:
+    """
+    Проект -> JSON в UTF-8 с отметкой saved_at.
+    compact=True — без отступов (меньше и быстрее), иначе indent=2 как раньше.
+    """
     data = dict(project)
+    if isinstance(data.get("defects"), DefectStore):
+        data["defects"] = data["defects"].to_list()
     data["saved_at"] = datetime.now().isoformat()
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+
+def write_atomic(path: str, raw: bytes):
+    """
+    Пишет файл через временный файл в той же папке + fsync + os.replace,
+    чтобы прерванная запись не портила существующий проект.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создаёт файл с правами 0600 — иначе после сохранения
+        # проект в общей папке перестанет читаться коллегами
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_project_bytes(path: str, raw: bytes):
+    """Сжимает JSON по расширению файла (.json.gz / .json.zst) и пишет атомарно"""
+    lower = path.lower()
+    if lower.endswith(GZIP_SUFFIX):
+        raw = gzip.compress(raw, compresslevel=6, mtime=0)
+    elif lower.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError("Для формата .json.zst нужен пакет zstandard")
+        raw = zstandard.ZstdCompressor(level=10).compress(raw)
+    write_atomic(path, raw)
+
+
+def save_json(path, project: dict, compact=None):
+    # сжатые архивы по умолчанию пишем без отступов
+    if compact is None:
+        compact = not path.lower().endswith(".json")
+    write_project_bytes(path, encode_project(project, compact=compact))
+
+
+def _decode(raw: bytes):
+    if raw.startswith(_GZIP_MAGIC):
+        raw = gzip.decompress(raw)
+    elif raw.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("Файл сжат zstd: установите пакет zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(raw, max_output_size=1 << 31)
+
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
 
 def load_json(path) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = _decode(f.read())
     if not isinstance(data, dict):
         raise ValueError("Некорректный формат проекта: ожидался JSON-объект")
 
     for key in ("bridge", "spans", "piers", "defects"):
         if key not in data:
             raise ValueError(f"Некорректный формат проекта: нет ключа '{key}'")
-    return data
\ No newline at end of file
+    return data
+
+
+def load_project_file(path) -> dict:
+    """Читает проект любого поддерживаемого формата: .json / .json.gz / .bdrt"""
+    if path.lower().endswith(BDRT_SUFFIX):
+        return load_bdrt(path)
+    return load_json(path)
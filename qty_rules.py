@@ -0,0 +1,367 @@
+# qty_rules.py
+"""
+Правила расчёта объёмов дефектов (поле qty_rule в БД).
+
+Каждое правило регистрируется декоратором @qty_rule и объявляет,
+какие поля проекта читает: "bridge.length", "spans.length", "piers.height".
+Вместо кода в БД можно записать выражение над полями проекта
+(«bridge.length * bridge.width_G», «sum(piers[*].pier_height)») —
+оно разбирается один раз и проверяется по белому списку узлов.
+По этим зависимостям после правки Формы 1 / листов ПС и опор
+пересчитываются только записи дефектов с затронутыми правилами.
+Подробнее: docs/defects_qty_rules.txt
+"""
+import ast
+import operator
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+# код правила -> QtyRule
+QTY_RULES = {}
+
+
+class QtyRule:
+    __slots__ = ("code", "reads", "compute", "missing")
+
+    def __init__(self, code: str, reads, compute, missing: str = ""):
+        self.code = code
+        self.reads = tuple(reads)
+        self.compute = compute    # compute(project) -> float или None
+        self.missing = missing    # текст предупреждения, если данных не хватает
+
+    def depends_on(self, field: str) -> bool:
+        """field — "bridge.length" или "spans.*" (добавлен/удалён лист)"""
+        if field.endswith(".*"):
+            section = field[:-1]
+            return any(r.startswith(section) for r in self.reads)
+        return field in self.reads
+
+
+def qty_rule(code: str, reads, missing: str = ""):
+    """Регистрирует функцию расчёта под кодом qty_rule"""
+    def decorator(func):
+        QTY_RULES[code] = QtyRule(code, reads, func, missing)
+        return func
+    return decorator
+
+
+def get_rule(code, strict: bool = False):
+    """
+    Правило по коду из БД или по выражению; MANUAL, пустой или
+    неизвестный код -> None. Ошибка в выражении: при strict — ValueError,
+    иначе None.
+    """
+    code = (code or "").strip()
+    rule = QTY_RULES.get(code.upper())
+    if rule is not None or not _EXPRESSION_HINT.search(code):
+        return rule
+    try:
+        return compile_expression(code)
+    except ValueError:
+        if strict:
+            raise
+        return None
+
+
+def to_float(value):
+    s = str(value or "").strip().replace(",", ".")
+    if s == "":
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def format_qty(value: float) -> str:
+    return f"{value:.2f}".replace(".", ",")
+
+
+def qty_prefix_by_unit(unit: str) -> str:
+    """Буква перед «=» в описании дефекта по единице измерения"""
+    u = (unit or "").lower().replace(" ", "")
+    if u in {"м2", "м²"}:
+        return "F"
+    if u == "м":
+        return "L"
+    if u in {"мм", "см"}:
+        return "T"
+    if u in {"шт", "pcs"}:
+        return "N"
+    return ""
+
+
+def option_with_qty(option: str, qty: str, unit: str) -> str:
+    """Описание дефекта с количеством новой строкой: «…\\nF = 12,50 м²»"""
+    if not qty:
+        return option
+    prefix = qty_prefix_by_unit(unit)
+    sign = f"{prefix} =" if prefix else "="
+    if unit:
+        return f"{option}\n{sign} {qty} {unit}".strip()
+    return f"{option}\n{sign} {qty}".strip()
+
+
+# ---------- правила ----------
+
+@qty_rule(
+    "DECK_AREA_G",
+    reads=("bridge.length", "bridge.width_G"),
+    missing="Для расчёта нужно заполнить на Форме 1:\n"
+            "• Длина сооружения\n"
+            "• Ширина проезжей части Г",
+)
+def deck_area_g(project):
+    bridge = project.get("bridge", {})
+    length = to_float(bridge.get("length"))
+    width_g = to_float(bridge.get("width_G"))
+    if length is None or width_g is None:
+        return None
+    return length * width_g
+
+
+@qty_rule(
+    "SIDEWALK_AREA_T",
+    reads=("bridge.length", "bridge.width_T1", "bridge.width_T2"),
+    missing="Для расчёта нужно заполнить на Форме 1:\n"
+            "• Длина сооружения\n"
+            "• Ширина тротуаров T1 и/или T2",
+)
+def sidewalk_area_t(project):
+    bridge = project.get("bridge", {})
+    length = to_float(bridge.get("length"))
+    t1 = to_float(bridge.get("width_T1")) or 0.0
+    t2 = to_float(bridge.get("width_T2")) or 0.0
+    if length is None or (t1 + t2) == 0.0:
+        return None
+    return length * (t1 + t2)
+
+
+# TODO: Enable BRIDGE_APPROACH_AREA after testing
+
+# @qty_rule(
+#     "BRIDGE_APPROACH_AREA",
+#     reads=("bridge.approach_width1", "bridge.approach_width2"),
+#     missing="Для расчёта нужно заполнить на Форме 1:\n"
+#             "• Ширина подхода 1\n"
+#             "• Ширина подхода 2",
+# )
+# def bridge_approach_area(project):
+#     approach_length1, approach_length2 = 25, 25
+#     bridge = project.get("bridge", {})
+#     width1 = to_float(bridge.get("approach_width1")) or 0.0
+#     width2 = to_float(bridge.get("approach_width2")) or 0.0
+#     if width1 == 0.0 or width2 == 0.0:
+#         return None
+#     return approach_length1 * width1 + approach_length2 * width2
+
+
+# ---------- правила-выражения ----------
+
+# код вроде DECK_AREA_G — не выражение; в выражении есть точка, цифра или знак
+_EXPRESSION_HINT = re.compile(r"[.\d()+\-*/]")
+
+_SECTIONS = ("bridge", "spans", "piers")  # bridge — одно значение, листы — список
+
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_UNARYOPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+class _Missing(Exception):
+    """В проекте не заполнено поле, нужное выражению"""
+
+
+def _aggregate(func, empty_ok=False):
+    def call(values):
+        if not values and not empty_ok:
+            raise _Missing()
+        return float(func(values))
+    return call
+
+
+# функция -> (для списка значений листов, для нескольких чисел или None)
+_FUNCS = {
+    "sum": (_aggregate(sum), None),
+    "min": (_aggregate(min), min),
+    "max": (_aggregate(max), max),
+    "count": (_aggregate(len, empty_ok=True), None),
+    "abs": (None, abs),
+    "round": (None, lambda x, n=0: round(x, int(n))),
+}
+
+
+def _field_getter(section: str, key: str):
+    if section == "bridge":
+        def get(project):
+            value = to_float(project.get("bridge", {}).get(key))
+            if value is None:
+                raise _Missing()
+            return value
+        return get, False
+
+    def get_all(project):
+        # незаполненные листы пропускаются
+        values = (to_float(item.get(key)) for item in project.get(section, []))
+        return [v for v in values if v is not None]
+    return get_all, True
+
+
+def _compile_node(node, reads: list, text: str):
+    """AST -> (функция(project), возвращает ли список)"""
+    def fail(what):
+        raise ValueError(f"Правило расчёта «{text}»: {what}")
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            fail("допустимы только числа")
+        value = float(node.value)
+        return (lambda project: value), False
+
+    if isinstance(node, ast.Attribute):
+        if not (isinstance(node.value, ast.Name) and node.value.id in _SECTIONS):
+            fail("поле задаётся как bridge.<ключ>, spans[*].<ключ> или piers[*].<ключ>")
+        field = f"{node.value.id}.{node.attr}"
+        if field not in reads:
+            reads.append(field)
+        return _field_getter(node.value.id, node.attr)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        op = _BINOPS[type(node.op)]
+        left, left_list = _compile_node(node.left, reads, text)
+        right, right_list = _compile_node(node.right, reads, text)
+        if left_list or right_list:
+            fail("поля листов (spans/piers) используются только внутри sum/min/max/count")
+        return (lambda project: op(left(project), right(project))), False
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+        op = _UNARYOPS[type(node.op)]
+        operand, is_list = _compile_node(node.operand, reads, text)
+        if is_list:
+            fail("поля листов (spans/piers) используются только внутри sum/min/max/count")
+        return (lambda project: op(operand(project))), False
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCS or node.keywords:
+            fail(f"допустимые функции: {', '.join(_FUNCS)}")
+        for_list, for_numbers = _FUNCS[node.func.id]
+        args = [_compile_node(arg, reads, text) for arg in node.args]
+        if len(args) == 1 and args[0][1]:
+            if for_list is None:
+                fail(f"{node.func.id}() не применяется к полям листов")
+            arg = args[0][0]
+            return (lambda project: for_list(arg(project))), False
+        if for_numbers is None or not args or any(is_list for _, is_list in args):
+            fail(f"неверные аргументы {node.func.id}()")
+        if node.func.id in ("min", "max") and len(args) < 2:
+            fail(f"{node.func.id}() от одного числа: нужно поле листов или два числа и больше")
+        funcs = [f for f, _ in args]
+        return (lambda project: float(for_numbers(*(f(project) for f in funcs)))), False
+
+    fail(f"недопустимая конструкция ({type(node).__name__})")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str) -> QtyRule:
+    """
+    Выражение из qty_rule -> правило; разбирается один раз на текст.
+    Разрешены числа, + - * /, скобки, поля bridge.<ключ>, spans[*].<ключ>,
+    piers[*].<ключ> и функции sum/min/max/count/abs/round.
+    """
+    source = text.replace("[*]", "")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Правило расчёта «{text}»: синтаксическая ошибка") from None
+
+    reads = []
+    func, is_list = _compile_node(tree.body, reads, text)
+    if is_list:
+        raise ValueError(f"Правило расчёта «{text}»: поля листов нужно свернуть "
+                         f"через sum/min/max/count")
+
+    def compute(project):
+        try:
+            return func(project)
+        except (_Missing, ZeroDivisionError, TypeError, ValueError, OverflowError):
+            # неудачный расчёт не должен ронять обработчик Tk — как пустое поле
+            return None
+
+    missing = "Для расчёта нужно заполнить:\n" + "\n".join(f"• {f}" for f in reads)
+    return QtyRule(text, reads, compute, missing)
+
+
+# ---------- пересчёт зависимых записей ----------
+
+class QtyDependents:
+    """
+    Индекс «правило -> uid записей», посчитанных по этому правилу.
+    Поддерживается при добавлении/удалении дефектов, поэтому после
+    правки поля пересчёт не проходит по всему списку дефектов:
+    каждое затронутое правило считается один раз на пачку.
+    """
+
+    def __init__(self, records=()):
+        self._by_rule = defaultdict(set)
+        for rec in records:
+            self.add(rec)
+
+    def add(self, rec: dict):
+        rule = get_rule(rec.get("qty_rule"))
+        if rule is not None:
+            self._by_rule[rule.code].add(rec["uid"])
+
+    def remove(self, rec: dict):
+        rule = get_rule(rec.get("qty_rule"))
+        if rule is not None:
+            self._by_rule[rule.code].discard(rec["uid"])
+
+    def update(self, rec: dict, old_fields: dict):
+        if "qty_rule" in old_fields:
+            self.remove({**rec, **old_fields})
+            self.add(rec)
+
+    def watches(self, field: str) -> bool:
+        """Есть ли записи, чьё правило читает это поле"""
+        for code, uids in self._by_rule.items():
+            rule = get_rule(code)
+            if uids and rule is not None and rule.depends_on(field):
+                return True
+        return False
+
+    def recompute(self, project, fields) -> dict:
+        """
+        fields — изменённые поля ("bridge.length", "piers.*").
+        Возвращает {uid: {"qty", "option"}} только для записей,
+        у которых количество действительно поменялось.
+        """
+        store = project["defects"]
+        changes = {}
+        for code, uids in self._by_rule.items():
+            rule = get_rule(code)
+            if not uids or rule is None or not any(rule.depends_on(f) for f in fields):
+                continue
+            value = rule.compute(project)
+            if value is None:
+                continue  # данных не хватает — прежнее значение оставляем
+            qty = format_qty(value)
+            for uid in uids:
+                rec = store.get(uid)
+                if rec is None or rec.get("qty", "") == qty:
+                    continue
+                fields_new = {"qty": qty}
+                base = rec.get("option_base", "")
+                unit = rec.get("unit", "")
+                # описание, поправленное вручную, не трогаем
+                if rec.get("option", "") == option_with_qty(base, rec.get("qty", ""), unit):
+                    fields_new["option"] = option_with_qty(base, qty, unit)
+                changes[uid] = fields_new
+        return changes
@@ -0,0 +1,62 @@
+# tabs/bulk_edit_dialog.py
+import tkinter as tk
+from tkinter import ttk
+
+
+class BulkEditDialog(tk.Toplevel):
+    """
+    Небольшая модальная форма для групповой правки строк Формы 5.
+    fields — [(ключ, подпись, значение по умолчанию, варианты или None)];
+    после закрытия в result лежит {ключ: значение} либо None (отмена).
+    """
+
+    def __init__(self, master, title: str, fields, note: str = ""):
+        super().__init__(master)
+        self.title(title)
+        self.transient(master)
+        self.resizable(False, False)
+        self.result = None
+        self._vars = {}
+
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill="both", expand=True)
+        frame.grid_columnconfigure(1, weight=1)
+
+        row = 0
+        if note:
+            ttk.Label(frame, text=note, foreground="gray")\
+                .grid(row=row, column=0, columnspan=2, sticky="w", pady=(0, 6))
+            row += 1
+
+        first = None
+        for key, label, default, values in fields:
+            var = tk.StringVar(value=default)
+            self._vars[key] = var
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky="w",
+                                              padx=(0, 6), pady=2)
+            if values is None:
+                widget = ttk.Entry(frame, textvariable=var, width=40)
+            else:
+                widget = ttk.Combobox(frame, textvariable=var, values=values,
+                                      state="readonly", width=38)
+            widget.grid(row=row, column=1, sticky="ew", pady=2)
+            first = first or widget
+            row += 1
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=row, column=0, columnspan=2, sticky="e", pady=(10, 0))
+        ttk.Button(buttons, text="Применить", command=self._ok).pack(side="left")
+        ttk.Button(buttons, text="Отмена", command=self.destroy)\
+            .pack(side="left", padx=(6, 0))
+
+        self.bind("<Return>", lambda e: self._ok())
+        self.bind("<Escape>", lambda e: self.destroy())
+        if first is not None:
+            first.focus_set()
+
+        self.grab_set()
+        self.wait_window()
+
+    def _ok(self):
+        self.result = {key: var.get() for key, var in self._vars.items()}
+        self.destroy()
@@ -0,0 +1,124 @@
+# tabs/multi_location_dialog.py
+import re
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# больше записей за раз почти наверняка опечатка в диапазоне
+MAX_LOCATIONS = 1000
+
+
+def parse_number_range(text: str) -> list:
+    """«1-14, 17, 20–22» -> [1, 2, ..., 14, 17, 20, 21, 22]"""
+    numbers = []
+    for part in re.split(r"[,;]", text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        m = re.fullmatch(r"(\d+)\s*[-–—]\s*(\d+)|(\d+)", part)
+        if not m:
+            raise ValueError(f"Не понял диапазон: «{part}»")
+        if m.group(3):
+            lo = hi = int(m.group(3))
+        else:
+            lo, hi = int(m.group(1)), int(m.group(2))
+        step = 1 if hi >= lo else -1
+        # размер проверяем до построения списка: «1-99999999» не должен
+        # раздувать память при каждом нажатии клавиши в предпросмотре
+        if abs(hi - lo) + 1 + len(numbers) > MAX_LOCATIONS:
+            raise ValueError(f"Слишком много номеров (больше {MAX_LOCATIONS})")
+        numbers.extend(range(lo, hi + step, step))
+    return numbers
+
+
+class MultiLocationDialog(tk.Toplevel):
+    """
+    Выбор нескольких местоположений для одного дефекта: листы ПС/опор
+    из проекта и/или диапазон номеров по шаблону («Опора {n}»).
+    После закрытия result — список местоположений или None.
+    """
+
+    def __init__(self, master, titles, pattern: str = "Опора № {n}"):
+        super().__init__(master)
+        self.title("Добавить на несколько элементов")
+        self.transient(master)
+        self.result = None
+        self.titles = list(titles)
+
+        frame = ttk.Frame(self, padding=10)
+        frame.pack(fill="both", expand=True)
+        frame.grid_columnconfigure(1, weight=1)
+        frame.grid_rowconfigure(1, weight=1)
+
+        ttk.Label(frame, text="Листы ПС и опор (Ctrl/Shift — несколько):")\
+            .grid(row=0, column=0, columnspan=2, sticky="w")
+        self.listbox = tk.Listbox(frame, selectmode="extended", height=12,
+                                  exportselection=False)
+        for title in self.titles:
+            self.listbox.insert("end", title)
+        self.listbox.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=(2, 8))
+        self.listbox.bind("<<ListboxSelect>>", lambda e: self._update_preview())
+
+        self.range_var = tk.StringVar()
+        self.pattern_var = tk.StringVar(value=pattern)
+        ttk.Label(frame, text="Номера (1-14, 17):").grid(row=2, column=0, sticky="w")
+        ttk.Entry(frame, textvariable=self.range_var)\
+            .grid(row=2, column=1, sticky="ew", pady=2)
+        ttk.Label(frame, text="Шаблон местоположения:").grid(row=3, column=0, sticky="w",
+                                                          padx=(0, 6))
+        ttk.Entry(frame, textvariable=self.pattern_var)\
+            .grid(row=3, column=1, sticky="ew", pady=2)
+        self.range_var.trace_add("write", lambda *_: self._update_preview())
+        self.pattern_var.trace_add("write", lambda *_: self._update_preview())
+
+        self.preview_label = ttk.Label(frame, text="", foreground="gray")
+        self.preview_label.grid(row=4, column=0, columnspan=2, sticky="w", pady=(6, 0))
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=5, column=0, columnspan=2, sticky="e", pady=(10, 0))
+        ttk.Button(buttons, text="Добавить", command=self._ok).pack(side="left")
+        ttk.Button(buttons, text="Отмена", command=self.destroy)\
+            .pack(side="left", padx=(6, 0))
+        self.bind("<Escape>", lambda e: self.destroy())
+
+        self._update_preview()
+        self.grab_set()
+        self.wait_window()
+
+    def _locations(self) -> list:
+        locations = [self.titles[i] for i in self.listbox.curselection()]
+        pattern = self.pattern_var.get()
+        for n in parse_number_range(self.range_var.get()):
+            locations.append(pattern.replace("{n}", str(n)))
+        return locations
+
+    def _update_preview(self):
+        try:
+            locations = self._locations()
+        except ValueError as e:
+            self.preview_label.config(text=str(e))
+            return
+        if not locations:
+            self.preview_label.config(text="Ничего не выбрано")
+            return
+        sample = ", ".join(locations[:3]) + (" …" if len(locations) > 3 else "")
+        self.preview_label.config(text=f"Будет добавлено записей: {len(locations)} ({sample})")
+
+    def _ok(self):
+        try:
+            locations = self._locations()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e), parent=self)
+            return
+        if not locations:
+            messagebox.showwarning("Нет данных", "Выберите листы или укажите номера.",
+                                   parent=self)
+            return
+        if len(locations) > MAX_LOCATIONS:
+            messagebox.showerror("Ошибка", f"Слишком много записей (больше {MAX_LOCATIONS})",
+                                 parent=self)
+            return
+        if "{n}" not in self.pattern_var.get() and self.range_var.get().strip():
+            messagebox.showerror("Ошибка", "В шаблоне нет {n}", parent=self)
+            return
+        self.result = locations
+        self.destroy()
@@ -3,10 +3,18 @@ import os
 import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
+from image_prefetch import ImagePrefetcher, build_pyramid, fit_size, pick_level
+from folder_scan import photo_scanner
+from utils import generate_uid
+
+# сколько снимков вперёд и назад читать заранее
+PREFETCH_AROUND = 3
+# пауза после последнего <Configure>, после которой рисуем начисто (мс)
+RESIZE_SETTLE_MS = 150
 
 
 class PhotoViewerWindow(tk.Toplevel):
-    def __init__(self, master, project, on_update=None):
+    def __init__(self, master, project, on_update=None, start_file=None, files=None):
         super().__init__(master)
         self.title("Просмотр фотографий")
         self.project = project
@@ -14,15 +22,20 @@ class PhotoViewerWindow(tk.Toplevel):
         self.folder = self.photos.get("folder", "")
         self.on_update = on_update
 
-        self.files = [
-            f for f in os.listdir(self.folder)
-            if f.lower().endswith((".jpg", ".jpeg", ".png"))
-        ]
-        self.files.sort()
+        if files is not None:
+            self.files = list(files)  # порядок задаёт вкладка (например, по времени съёмки)
+        else:
+            self.files = photo_scanner.list(self.folder)
 
-        self.index = 0
+        self.index = self.files.index(start_file) if start_file in self.files else 0
         self.current_image = None
         self.current_pil = None
+        self.prefetcher = ImagePrefetcher((self.winfo_screenwidth(), self.winfo_screenheight()))
+        self._poll_job = None
+        self._resize_job = None
+        self._pyramid = None       # (исходник, уровни) для текущего снимка
+        self._current_final = False  # current_pil — уже не превью
+        self._rendered_key = None  # (снимок, размер, качество) последней отрисовки
 
         self._build_ui()
         # хоткеи
@@ -118,9 +131,11 @@ class PhotoViewerWindow(tk.Toplevel):
         gallery = self.photos.get("gallery", [])
         for r in gallery:
             if r.get("filename") == filename:
+                if r.get("caption", "") == self.caption_var.get():
+                    return
                 r["caption"] = self.caption_var.get()
                 if self.on_update:
-                    self.on_update()
+                    self.on_update(r, "caption")
                 return
             
 
@@ -154,11 +169,19 @@ class PhotoViewerWindow(tk.Toplevel):
         return "break"
             
     def _on_resize(self, event=None):
-        # если картинка уже загружена — перерисуем под новый размер
-        if self.current_pil is not None:
-            self._render_current_image()
+        # пока окно тянут — быстрый черновик, начисто — когда размер перестал меняться
+        if self.current_pil is None:
+            return
+        self._render_current_image(fast=True)
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(RESIZE_SETTLE_MS, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        self._resize_job = None
+        self._render_current_image()
 
-    def _render_current_image(self):
+    def _render_current_image(self, fast=False):
         if self.current_pil is None:
             return
 
@@ -168,11 +191,62 @@ class PhotoViewerWindow(tk.Toplevel):
         if max_w < 50 or max_h < 50:
             return
 
-        img = self.current_pil.copy()
-        img.thumbnail((max_w, max_h), Image.LANCZOS)
+        # превью растягиваем на всю область, пока не пришло изображение под экран
+        size = fit_size(self.current_pil.size, (max_w, max_h),
+                        upscale=not self._current_final)
+        key = (id(self.current_pil), size, fast)
+        if key == self._rendered_key or \
+                (fast and self._rendered_key == key[:2] + (False,)):
+            return  # этот размер уже нарисован (начисто — тем более)
+
+        if self._pyramid is None or self._pyramid[0] is not self.current_pil:
+            self._pyramid = (self.current_pil, build_pyramid(self.current_pil))
+        level = pick_level(self._pyramid[1], size)
+        if level.size == size:
+            img = level
+        else:
+            img = level.resize(size, Image.BILINEAR if fast else Image.LANCZOS)
 
+        self._rendered_key = key
         self.current_image = ImageTk.PhotoImage(img)
-        self.image_label.configure(image=self.current_image)
+        self.image_label.configure(image=self.current_image, text="")
+
+    def _prefetch_around(self):
+        """Текущий снимок, затем соседи по очереди: +1, -1, +2, -2, …"""
+        order = [self.index]
+        for step in range(1, PREFETCH_AROUND + 1):
+            order += [self.index + step, self.index - step]
+        paths = [os.path.join(self.folder, self.files[i])
+                 for i in order if 0 <= i < len(self.files)]
+        self.prefetcher.request(paths, preview=not self._current_final)
+        if self._poll_job is None:
+            self._poll_job = self.after(30, self._poll_prefetch)
+
+    def _poll_prefetch(self):
+        self._poll_job = None
+        current = os.path.join(self.folder, self.files[self.index]) if self.files else None
+        for path, img, final in self.prefetcher.poll():
+            if path != current or self._current_final:
+                continue
+            if img is None:
+                if final:
+                    self.image_label.configure(image="", text="")
+                    self.filename_label.config(text=f"{self.files[self.index]} (не удалось открыть)")
+                continue
+            # сначала грубое превью, затем изображение под экран
+            self.current_pil = img
+            self._current_final = final
+            self._render_current_image(fast=not final)
+        if self.prefetcher.busy:
+            self._poll_job = self.after(30, self._poll_prefetch)
+
+    def destroy(self):
+        for job in (self._poll_job, self._resize_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._poll_job = self._resize_job = None
+        self.prefetcher.shutdown()
+        super().destroy()
     
     def _load_current(self):
         if not self.files:
@@ -183,20 +257,19 @@ class PhotoViewerWindow(tk.Toplevel):
         filename = self.files[self.index]
         path = os.path.join(self.folder, filename)
 
-        # читаем исходник и сохраняем
-        try:
-            self.current_pil = Image.open(path)
-        except Exception:
-            self.current_pil = None
-            self.image_label.configure(image="")
-            self.filename_label.config(text=f"{filename} (не удалось открыть)")
-            return
-
         self.filename_label.config(text=filename)
         self.counter_label.config(text=f"{self.index + 1} / {len(self.files)}")
 
-        # отрисовать под текущий размер области
-        self._render_current_image()
+        # снимок уже прочитан заранее — рисуем сразу, иначе ждём рабочий поток
+        self.current_pil = self.prefetcher.get(path)
+        self._current_final = self.current_pil is not None
+        self._rendered_key = None
+        if self.current_pil is not None:
+            self._render_current_image()
+        else:
+            self.current_image = None
+            self.image_label.configure(image="", text="Загрузка…")
+        self._prefetch_around()
 
         # синхронизация чекбокса/подписи
         gallery = self.photos["gallery"]
@@ -215,12 +288,16 @@ class PhotoViewerWindow(tk.Toplevel):
         filename = self.files[self.index]
         gallery = self.photos["gallery"]
 
+        changes = []  # (запись, действие) — вкладка правит только эти строки таблицы
         if self.include_var.get():
             # если уже есть — не дублируем
             rec = next((r for r in gallery if r.get("filename") == filename), None)
             if not rec:
-                rec = {"filename": filename, "caption": ""}
+                rec = {"uid": generate_uid(), "filename": filename, "caption": ""}
                 gallery.append(rec)
+                changes.append((rec, "add"))
+            else:
+                changes.append((rec, "caption"))
 
             # включили → разрешаем ввод и сохраняем текущий текст
             self.caption_entry.state(["!disabled"])
@@ -228,12 +305,14 @@ class PhotoViewerWindow(tk.Toplevel):
 
         else:
             # выключили → удаляем запись
+            changes = [(r, "remove") for r in gallery if r.get("filename") == filename]
             gallery[:] = [r for r in gallery if r.get("filename") != filename]
             self.caption_entry.state(["disabled"])
             self.caption_var.set("")
 
         if self.on_update:
-            self.on_update()
+            for rec, action in changes:
+                self.on_update(rec, action)
 
     def next_photo(self):
         if self.index < len(self.files) - 1:
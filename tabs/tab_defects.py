@@ -2,6 +2,29 @@
 import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
+from defect_ranges import DefectRangeIndex, parse_measurement
+from tabs.virtual_table import VirtualTable
+from tabs.bulk_edit_dialog import BulkEditDialog
+from tabs.multi_location_dialog import MultiLocationDialog
+from defect_view import DefectView, CATEGORY_FILTERS
+from condition_rating import ConditionRating
+from qty_rules import QtyDependents, get_rule, format_qty, option_with_qty
+
+# поля записи дефекта, доступные для групповой правки: ключ -> подпись
+BULK_FIELDS = {
+    "location": "Местоположение",
+    "name": "Тип",
+    "option": "Описание",
+    "action": "Мероприятия",
+    "safety": "Категория Б",
+    "durability": "Категория Д",
+    "repairability": "Категория Р",
+    "loadcap": "Категория Г",
+}
+# текстовые столбцы для «Найти и заменить»
+BULK_TEXT_FIELDS = ("location", "name", "option", "action")
+# пауза в наборе «Кол-во», после которой подбирается вариант дефекта, мс
+MEASURE_SETTLE_MS = 600
 
 
 class DefectsTabMixin:
@@ -78,6 +101,11 @@ class DefectsTabMixin:
 
         self.qty_entry = ttk.Entry(qty_right_frame, width=12)
         self.qty_entry.pack(side="left", padx=5)
+        # по введённому значению подбираем вариант дефекта (minValue/maxvalue):
+        # после паузы в наборе, при Enter или уходе из поля
+        self.qty_entry.bind("<KeyRelease>", self.schedule_measured_value)
+        self.qty_entry.bind("<Return>", self.apply_measured_value)
+        self.qty_entry.bind("<FocusOut>", self.apply_measured_value)
 
         self.unit_label = ttk.Label(qty_right_frame, text="Ед.изм.: —")
         self.unit_label.pack(side="left", padx=(10, 0))
@@ -92,13 +120,58 @@ class DefectsTabMixin:
         self.action_entry.grid(row=13, column=0, columnspan=2, sticky="ew",
                                padx=5, pady=2)
 
-        ttk.Button(frame, text="Добавить в отчёт",
-                   command=self.add_entry).grid(row=14, column=0, pady=10)
+        add_buttons = ttk.Frame(frame)
+        add_buttons.grid(row=14, column=0, pady=10)
+        ttk.Button(add_buttons, text="Добавить в отчёт",
+                   command=self.add_entry).pack(side="left")
+        ttk.Button(add_buttons, text="На несколько элементов...",
+                   command=self.add_entry_multi).pack(side="left", padx=(6, 0))
         ttk.Button(frame, text="Сохранить",
                    command=self.save_project).grid(row=14, column=1, pady=10)
 
         self.load_placements()
 
+        # Сортировка / группировка / быстрые фильтры таблицы
+        self.defect_view = DefectView(self.project["defects"])
+        self.condition_rating = ConditionRating(self.project["defects"])
+        self.qty_dependents = QtyDependents(self.project["defects"])
+        self._filter_job = None
+        self._qty_job = None
+        self._qty_changed = set()
+        self._measure_job = None
+
+        filter_bar = ttk.Frame(self.tab_defects, padding=(10, 0))
+        filter_bar.pack(fill="x")
+
+        ttk.Label(filter_bar, text="Раздел:").pack(side="left")
+        self.filter_placement_cb = ttk.Combobox(
+            filter_bar, state="readonly", width=30,
+            values=("",) + tuple(self.placement_cb["values"]))
+        self.filter_placement_cb.pack(side="left", padx=(4, 10))
+        self.filter_placement_cb.bind("<<ComboboxSelected>>",
+                                      lambda e: self.apply_table_filters())
+
+        ttk.Label(filter_bar, text="Категория:").pack(side="left")
+        self.filter_category_cb = ttk.Combobox(
+            filter_bar, state="readonly", width=6,
+            values=("",) + tuple(CATEGORY_FILTERS))
+        self.filter_category_cb.pack(side="left", padx=(4, 10))
+        self.filter_category_cb.bind("<<ComboboxSelected>>",
+                                     lambda e: self.apply_table_filters())
+
+        ttk.Label(filter_bar, text="Поиск:").pack(side="left")
+        self.filter_text_var = tk.StringVar()
+        ttk.Entry(filter_bar, textvariable=self.filter_text_var, width=25)\
+            .pack(side="left", padx=(4, 10))
+        self.filter_text_var.trace_add("write", lambda *_: self._schedule_table_filter())
+
+        self.group_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_bar, text="Группировать по разделам",
+                        variable=self.group_var,
+                        command=self.toggle_table_grouping).pack(side="left")
+        ttk.Button(filter_bar, text="Сбросить",
+                   command=self.reset_table_view).pack(side="right")
+
         # Таблица с прокруткой
         table_container = ttk.Frame(self.tab_defects)
         table_container.pack(fill="both", expand=True)
@@ -110,8 +183,11 @@ class DefectsTabMixin:
                                            orient="horizontal")
         self.tree_scroll_x.pack(side="bottom", fill="x")
 
-        self.table = ttk.Treeview(
+        # создаются только видимые строки, данные берутся прямо из проекта
+        self.table = VirtualTable(
             table_container,
+            rows=lambda: self.defect_view.records(),
+            row_values=self._defect_row_values,
             columns=(
             "Раздел", "Местоположение", "Тип", "Описание", "Категории",
             "Мероприятия"),
@@ -124,7 +200,8 @@ class DefectsTabMixin:
         self.tree_scroll_x.config(command=self.table.xview)
 
         for col in self.table["columns"]:
-            self.table.heading(col, text=col)
+            self.table.heading(col, text=col,
+                               command=lambda c=col: self.sort_table_by(c))
             self.table.column(col, minwidth=50, width=150, stretch=False)
 
         self.table.pack(fill="both", expand=True)
@@ -156,6 +233,10 @@ class DefectsTabMixin:
         self.count_label = ttk.Label(self.tab_defects, text="Всего дефектов: "
                                                             "0", anchor="e")
         self.count_label.pack(side="right", padx=10, pady=0)
+        # оценка технического состояния, обновляется при каждой правке
+        self.condition_label = ttk.Label(self.tab_defects, text="", anchor="e")
+        self.condition_label.pack(side="right", padx=10, pady=0)
+        self.update_status_bar()
 
 
         # Вызов стандартного меню для Entry / Text / Combobox
@@ -276,6 +357,7 @@ class DefectsTabMixin:
 
     def load_placements(self):
         self.placement_cb['values'] = self.db.get_placements()
+        self.defect_range_index = DefectRangeIndex(self.db.get_defect_ranges())
 
     def load_defects(self, event=None):
         placement = self.placement_cb.get()
@@ -307,31 +389,55 @@ class DefectsTabMixin:
             self.defect_unit_by_option[(name, option)] = units or ""
             self.defect_rule_by_option[(name, option)] = qty_rule or ""
 
-        # Combobox с отображением локализации
-        self.defect_cb["values"] = sorted(
-            [f"{name} ({localization})" if localization else name
-             for (name, localization), (num, pl, loc) in
-             self.defect_numodm_map.items()
-             if pl == placement]
-        )
+        # Combobox с отображением локализации (список готов в снимке справочника)
+        self.defect_cb["values"] = self.db.get_defect_display_names(placement, rows)
+
+        # строки поиска: название + локализация + варианты описания
+        self.defect_search_items = []
+        for (name, localization), (num_odm, _, _) in self.defect_numodm_map.items():
+            display = f"{name} ({localization})" if localization else name
+            haystack = " ".join(
+                [name, localization] + self.defect_options_by_numodm.get(num_odm, [])
+            ).lower()
+            self.defect_search_items.append((display, haystack))
+        # порядок как в полном списке
+        self.defect_search_items.sort()
+        self._defect_query = None
+        self._defect_matches = self.defect_search_items
+        if self.search_entry.get().strip():
+            self._apply_defect_filter()
 
     def filter_defect_names(self, event=None):
-        text = self.search_entry.get().lower()
-        placement = self.placement_cb.get()
+        # фильтруем после паузы в наборе, а не на каждую клавишу
+        job = getattr(self, "_defect_filter_job", None)
+        if job is not None:
+            self.root.after_cancel(job)
+        self._defect_filter_job = self.root.after(150, self._apply_defect_filter)
+
+    def _apply_defect_filter(self):
+        self._defect_filter_job = None
+        items = getattr(self, "defect_search_items", None)
+        if items is None:
+            return
 
-        # фильтруем по name и localization
-        filtered_keys = [
-            key for key, (num_odm, pl, localization) in
-            self.defect_numodm_map.items()
-            if pl == placement and (
-                        text in key[0].lower() or text in key[1].lower())
-        ]
+        query = self.search_entry.get().lower().strip()
+        if query == self._defect_query:
+            return
 
-        # отображаем в combobox красиво
-        self.defect_cb["values"] = [
-            f"{name} ({localization})" if localization else name
-            for name, localization in filtered_keys
-        ]
+        # запрос дописали — ищем только среди прошлых совпадений
+        if self._defect_query and self._defect_query in query:
+            source = self._defect_matches
+        else:
+            source = items
+        tokens = query.split()
+        matches = [it for it in source if all(t in it[1] for t in tokens)]
+
+        self._defect_query = query
+        self._defect_matches = matches
+
+        values = tuple(display for display, _ in matches)
+        if values != tuple(self.defect_cb["values"]):
+            self.defect_cb["values"] = values
 
     def populate_defect_fields(self, event=None):
         selected_text = self.defect_cb.get()
@@ -348,6 +454,8 @@ class DefectsTabMixin:
         # получаем num_odm и опции по ключу (name, localization)
         num_odm, _, _ = self.defect_numodm_map.get((name, localization),
                                                    (None, None, None))
+        self.current_num_odm = num_odm
+        self._calculated_qty = None  # расчёт относился к прежнему дефекту
 
         # заполняем описание дефекта
         options = self.defect_options_by_numodm.get(num_odm, [])
@@ -367,8 +475,10 @@ class DefectsTabMixin:
             if repair_action:
                 self.action_entry.insert(0, repair_action)
 
-    def populate_category_fields(self, event=None):
+    def populate_category_fields(self, event=None, keep_qty: bool = False):
         option = self.option_cb.get()
+        if not keep_qty:
+            self._calculated_qty = None
         defect_name = self.defect_cb.get()
 
         # если в combobox добавлена локализация, нужно её убрать для поиска
@@ -413,27 +523,251 @@ class DefectsTabMixin:
                 else:
                     self.calc_btn.config(state="disabled")
 
-            self.qty_entry.delete(0, tk.END)
+            if not keep_qty:
+                self.qty_entry.delete(0, tk.END)
+
+    def schedule_measured_value(self, event=None):
+        """Подбор варианта откладывается, пока в «Кол-во» набирают число"""
+        if self._measure_job is not None:
+            self.root.after_cancel(self._measure_job)
+        self._measure_job = self.root.after(MEASURE_SETTLE_MS, self.apply_measured_value)
+
+    def apply_measured_value(self, event=None):
+        """
+        Подбирает вариант дефекта и категории по значению в поле «Кол-во»,
+        если для дефекта в БД заданы диапазоны minValue/maxvalue.
+        """
+        if self._measure_job is not None:
+            self.root.after_cancel(self._measure_job)
+            self._measure_job = None
+
+        num_odm = getattr(self, "current_num_odm", None)
+        index = getattr(self, "defect_range_index", None)
+        if not num_odm or index is None or not index.has_ranges(num_odm):
+            return
+
+        qty = self.qty_entry.get()
+        match = index.classify(num_odm, parse_measurement(qty))
+        if match is None or match.option == self.option_cb.get():
+            return
+
+        self.option_cb.set(match.option)
+        # поле «Кол-во» не переписываем: набранное число и курсор остаются на месте
+        self.populate_category_fields(keep_qty=True)
+
+    # --- изменения списка дефектов: проект + таблица + журнал ---
+
+    def _defect_row_values(self, rec):
+        """Значения строки таблицы Формы 5 для записи дефекта"""
+        cats = []
+        if rec.get("safety"):
+            cats.append(f"Б{rec['safety']}")
+        if rec.get("durability"):
+            cats.append(f"Д{rec['durability']}")
+        if rec.get("repairability"):
+            cats.append(f"Р{rec['repairability']}")
+        try:
+            if rec.get("loadcap") and int(rec["loadcap"]) == 1:
+                cats.append("Г")
+        except ValueError:
+            pass
+
+        return (
+            rec.get("placement", ""),
+            rec.get("location", ""),
+            rec.get("name", ""),
+            rec.get("option", ""),
+            ", ".join(cats),
+            rec.get("action", "")
+        )
+
+    def defect_page_steps(self, pages, count: int, page_size: int) -> list:
+        """Догрузка дефектов из файла порциями — для поэтапной загрузки"""
+        self._defect_pages = pages
+
+        def load_page():
+            if self._defect_pages is None:
+                return  # уже дочитаны целиком (сохранение, правка)
+            records = next(self._defect_pages, None)
+            if records is None:
+                self._defect_pages = None
+                return
+            self._add_loaded_defects(records)
+
+        steps = [load_page] * -(-count // page_size)
+        steps.append(self._finish_defect_loading)
+        return steps
+
+    def _finish_defect_loading(self):
+        """
+        Дочитывает оставшиеся порции дефектов. Вызывается перед правкой
+        списка, пересчётом, сохранением и экспортом — им нужен весь список.
+        """
+        pages, self._defect_pages = self._defect_pages, None
+        if pages is None:
+            return
+        records = [rec for page in pages for rec in page]
+        if records:
+            self._add_loaded_defects(records)
+
+    def _add_loaded_defects(self, records):
+        """Записи, прочитанные из файла: без журнала и истории отмены"""
+        store = self.project["defects"]
+        start = len(store)
+        store.load_page(records)
+        added = store.records()[start:]
+        self.defect_view.added(added)
+        for rec in added:
+            self.condition_rating.add(rec)
+            self.qty_dependents.add(rec)
+        self.table.refresh()
+        self.update_status_bar()
+
+    def _insert_defects(self, items):
+        """
+        Вставляет записи: items — [(позиция в списке, запись)]
+        по возрастанию позиций (именно так их возвращает _remove_defects).
+        """
+        self._finish_defect_loading()
+        self.project["defects"].insert_many(items)
+        self.defect_view.added([rec for _, rec in items])
+        for _, rec in items:
+            self.condition_rating.add(rec)
+            self.qty_dependents.add(rec)
+        if len(items) == 1:
+            index, rec = items[0]
+            self._journal("defect_add", rec=rec, index=index)
+        elif items:
+            self._journal("defect_add_many", items=[[i, rec] for i, rec in items])
+        self.table.refresh()
+
+    def _remove_defects(self, uids) -> list:
+        """Удаляет записи по uid пачкой, возвращает удалённое для отмены"""
+        self._finish_defect_loading()
+        removed = self.project["defects"].remove(uids)
+        self.defect_view.removed([rec for _, rec in removed])
+        for _, rec in removed:
+            self.condition_rating.remove(rec)
+            self.qty_dependents.remove(rec)
+        self.table.refresh()
+        self._journal("defect_delete", uids=[rec["uid"] for _, rec in removed])
+        return removed
+
+    def _update_defect(self, uid, fields: dict):
+        """Меняет поля записи, возвращает их прежние значения (None — нет записи)"""
+        self._finish_defect_loading()
+        old = self.project["defects"].update(uid, fields)
+        if old is None:
+            return None
+        self.defect_view.updated([uid])
+        rec = self.project["defects"].get(uid)
+        self.condition_rating.update(rec, old)
+        self.qty_dependents.update(rec, old)
+        self.table.refresh()
+        self._journal("defect_update", uid=uid, fields=fields)
+        return old
+
+    def _update_defects(self, changes: dict) -> dict:
+        """Пакетная правка {uid: поля}: одно обновление таблицы и одна запись журнала"""
+        self._finish_defect_loading()
+        old = self.project["defects"].update_many(changes)
+        if old:
+            self.defect_view.updated(list(old))
+            store = self.project["defects"]
+            for uid, fields in old.items():
+                self.condition_rating.update(store.get(uid), fields)
+                self.qty_dependents.update(store.get(uid), fields)
+            self.table.refresh()
+            self._journal("defect_update_many",
+                          changes={uid: changes[uid] for uid in old})
+        return old
+
+    def reset_defect_views(self):
+        """Новый/загруженный проект: пересобрать представление таблицы и оценку"""
+        self.defect_view.reset(self.project["defects"])
+        self.condition_rating = ConditionRating(self.project["defects"])
+        self.qty_dependents = QtyDependents(self.project["defects"])
+        self._qty_changed.clear()
+        self.table.selection_clear()
+        self.table.yview_moveto(0)
+        self.update_status_bar()
 
     def update_status_bar(self):
+        self.condition_label.config(text=self.condition_rating.summary())
         total = len(self.project["defects"])
-        self.count_label.config(text=f"Всего дефектов: {total}")
-
-    def _qty_prefix_by_unit(self, unit: str) -> str:
-        u = (unit or "").lower().replace(" ", "")
-        if u in {"м2", "м²"}:
-            return "F"
-        if u == "м":
-            return "L"
-        if u in {"мм", "см"}:
-            return "T"
-        if u in {"шт", "pcs"}:
-            return "N"
-        return ""
-
-    def add_entry(self):
+        if self.defect_view.filtered:
+            shown = len(self.defect_view.records())
+            self.count_label.config(text=f"Показано: {shown} из {total}")
+        else:
+            self.count_label.config(text=f"Всего дефектов: {total}")
+
+    # --- сортировка, группировка и фильтры таблицы ---
+
+    def sort_table_by(self, column):
+        view = self.defect_view
+        if view.sort_column != column:
+            view.set_sort(column)
+        elif not view.descending:
+            view.set_sort(column, descending=True)
+        else:
+            view.set_sort(None)  # третий щелчок — порядок добавления
+
+        for col in self.table["columns"]:
+            mark = ""
+            if col == view.sort_column:
+                mark = " ▼" if view.descending else " ▲"
+            self.table.heading(col, text=col + mark)
+        self.table.refresh()
+
+    def toggle_table_grouping(self):
+        self.defect_view.set_group(self.group_var.get())
+        self.table.refresh()
+
+    def _schedule_table_filter(self):
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(200, self.apply_table_filters)
+
+    def apply_table_filters(self):
+        self._filter_job = None
+        self.defect_view.set_filters(
+            placement=self.filter_placement_cb.get(),
+            category=self.filter_category_cb.get(),
+            text=self.filter_text_var.get()
+        )
+        self.table.yview_moveto(0)
+        self.update_status_bar()
+
+    def reset_table_view(self):
+        self.filter_placement_cb.set("")
+        self.filter_category_cb.set("")
+        self.filter_text_var.set("")
+        self.group_var.set(False)
+        self.defect_view.set_group(False)
+        if self.defect_view.sort_column is not None:
+            self.defect_view.set_sort(None)
+            for col in self.table["columns"]:
+                self.table.heading(col, text=col)
+        self.apply_table_filters()
+
+    def add_entry_multi(self):
+        """Один и тот же дефект на нескольких ПС/опорах — одной пачкой"""
+        if not self.placement_cb.get() or not self.defect_cb.get():
+            messagebox.showerror("Ошибка", "Выберите раздел и тип дефекта")
+            return
+        titles = [x.get("title", "") for x in self.project.get("spans", [])]
+        titles += [x.get("title", "") for x in self.project.get("piers", [])]
+        dlg = MultiLocationDialog(self.root, [t for t in titles if t])
+        if dlg.result:
+            self.add_entry(locations=dlg.result)
+
+    def add_entry(self, locations=None):
+        if self._measure_job is not None:
+            self.apply_measured_value()  # число набрано, пауза ещё не прошла
+        self._finish_defect_loading()  # новая запись — после всех загруженных
         placement = self.placement_cb.get()
-        location = self.location_entry.get()
+        if locations is None:
+            locations = [self.location_entry.get()]
         selected_text = self.defect_cb.get()
         option = self.option_cb.get()
         qty = self.qty_entry.get().strip() if hasattr(self, "qty_entry") else ""
@@ -461,22 +795,10 @@ class DefectsTabMixin:
         else:
             name = selected_text
 
-        uid = self._generate_uid()
-
-        option_full = option
-        if qty:
-            prefix = self._qty_prefix_by_unit(unit_text)
-            sign = f"{prefix} =" if prefix else "="
-            # добавляем значение с новой строки
-            if unit_text:
-                option_full = f"{option_full}\n{sign} {qty} {unit_text}".strip()
-            else:
-                option_full = f"{option_full}\n{sign} {qty}".strip()
-
-        rec = {
-            'uid': uid,
-            'placement': placement,
-            'location': location,
+        # значение добавляется в описание с новой строки
+        option_full = option_with_qty(option, qty, unit_text)
+
+        template = {
             'name': name,
             'option': option_full,
             'qty': qty,
@@ -487,23 +809,32 @@ class DefectsTabMixin:
             'loadcap': loadcap,
             'action': action_text
         }
-        self.project["defects"].append(rec)
-
-        cats = []
-        if safety: cats.append(f"Б{safety}")
-        if durability: cats.append(f"Д{durability}")
-        if repairability: cats.append(f"Р{repairability}")
-        try:
-            if loadcap and int(loadcap) == 1:
-                cats.append("Г")
-        except ValueError:
-            pass
-
-        self.table.insert("", "end", iid=uid, values=(placement, location, name, option_full, ", ".join(cats), action_text))
+        # количество посчитано по правилу — запоминаем его для пересчёта
+        calculated = getattr(self, "_calculated_qty", None)
+        rule = get_rule(getattr(self, "current_qty_rule", ""))
+        if qty and calculated and rule is not None and calculated == (rule.code, qty):
+            template['qty_rule'] = calculated[0]
+            template['option_base'] = option
+        self._calculated_qty = None
+        start = len(self.project["defects"])
+        added = [
+            (start + i, {'uid': self._generate_uid(), 'placement': placement,
+                         'location': location, **template})
+            for i, location in enumerate(locations)
+        ]
+        uids = [rec['uid'] for _, rec in added]
+        self._insert_defects(added)
+        self.history.push(
+            "Добавление дефекта" if len(added) == 1 else f"Добавление дефектов ({len(added)})",
+            undo=lambda: self._remove_defects(uids),
+            redo=lambda: self._insert_defects(added)
+        )
 
-        self.status_label.config(text="Строка добавлена в отчёт")
-        self.count_label.config(text=f"Всего дефектов: "
-                                     f"{len(self.project['defects'])}")
+        if len(added) == 1:
+            self.status_label.config(text="Строка добавлена в отчёт")
+        else:
+            self.status_label.config(text=f"Добавлено строк: {len(added)}")
+        self.update_status_bar()
         self.root.after(2000, lambda: self.status_label.config(text=""))
         self.action_entry.delete(0, tk.END)
         self.qty_entry.delete(0, tk.END)
@@ -581,23 +912,18 @@ class DefectsTabMixin:
     
         def save_edit(event=None):
             new_value = entry.get()
-            values = list(self.table.item(row_id, 'values'))
-            values[col_index] = new_value
-            self.table.item(row_id, values=values)
             entry.destroy()
 
             # синхронизация project["defects"]
-            for rec in self.project["defects"]:
-                if rec['uid'] == row_id:
-                    if col_index == 1:
-                        rec['location'] = new_value
-                    elif col_index == 2:
-                        rec['name'] = new_value
-                    elif col_index == 3:
-                        rec['option'] = new_value
-                    elif col_index == 5:
-                        rec['action'] = new_value
-                    break
+            field = {1: 'location', 2: 'name', 3: 'option', 5: 'action'}[col_index]
+            new_fields = {field: new_value}
+            old_fields = self._update_defect(row_id, new_fields)
+            if old_fields is not None and old_fields != new_fields:
+                self.history.push(
+                    "Изменение ячейки",
+                    undo=lambda: self._update_defect(row_id, old_fields),
+                    redo=lambda: self._update_defect(row_id, new_fields)
+                )
             self.update_status_bar()
             if not getattr(self, "is_loading", False):
                 self.is_dirty = True
@@ -612,8 +938,19 @@ class DefectsTabMixin:
     def show_context_menu(self, event):
         row_id = self.table.identify_row(event.y)
         if row_id:
-            self.table.selection_set(row_id)
+            # щелчок по уже выделенной строке не сбрасывает групповое выделение
+            if row_id not in self.table.selection():
+                self.table.selection_set(row_id)
             menu = tk.Menu(self.root, tearoff=0)
+            menu.add_command(label="Задать значение поля...",
+                             command=self.bulk_set_field)
+            menu.add_command(label="Найти и заменить...",
+                             command=self.bulk_find_replace)
+            menu.add_command(label="Перенумеровать местоположение...",
+                             command=self.bulk_renumber)
+            menu.add_command(label="Перенести в раздел...",
+                             command=self.bulk_move_placement)
+            menu.add_separator()
             menu.add_command(label="Удалить", command=self.delete_selected_row)
             try:
                 menu.tk_popup(event.x_root, event.y_root)
@@ -624,80 +961,193 @@ class DefectsTabMixin:
         sel = self.table.selection()
         if not sel:
             return
-        for iid in sel:
-            # удалить из report_data
-            self.project["defects"] = [r for r in self.project["defects"] if r[
-                'uid'] != iid]
-            self.table.delete(iid)
+        uids = list(sel)
+        removed = self._remove_defects(uids)
+        self.history.push(
+            "Удаление дефектов",
+            undo=lambda: self._insert_defects(removed),
+            redo=lambda: self._remove_defects(uids)
+        )
         self.update_status_bar()
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
 
-    def calculate_qty(self):
-        # Правила расчёта объёмов дефектов: см. docs/defects_qty_rules.txt
-        rule = getattr(self, "current_qty_rule", "") or ""
-        rule = rule.upper().strip()
+    # --- групповые операции над выделенными строками ---
 
-        bridge = self.project.get("bridge", {})
+    def _selected_records(self) -> list:
+        """Выделенные записи в порядке таблицы"""
+        store = self.project["defects"]
+        uids = [uid for uid in self.table.selection() if uid in store]
+        return [store.get(uid) for uid in sorted(uids, key=store.index)]
 
-        def _to_float(value: str):
-            s = (value or "").strip().replace(",", ".")
-            if s == "":
-                return None
-            try:
-                return float(s)
-            except ValueError:
-                return None
-
-        if rule == "DECK_AREA_G":
-            length = _to_float(bridge.get("length", ""))
-            width_g = _to_float(bridge.get("width_G", ""))
-            if length is None or width_g is None:
-                messagebox.showwarning(
-                    "Недостаточно данных",
-                    "Для расчёта нужно заполнить на Форме 1:\n"
-                    "• Длина сооружения\n"
-                    "• Ширина проезжей части Г"
-                )
-                return
-            area = length * width_g
-            self.qty_entry.delete(0, tk.END)
-            self.qty_entry.insert(0, f"{area:.2f}".replace(".", ","))
-
-        elif rule == "SIDEWALK_AREA_T":
-            length = _to_float(bridge.get("length", ""))
-            t1 = _to_float(bridge.get("width_T1", "")) or 0.0
-            t2 = _to_float(bridge.get("width_T2", "")) or 0.0
-            if length is None or (t1 + t2) == 0.0:
-                messagebox.showwarning(
-                    "Недостаточно данных",
-                    "Для расчёта нужно заполнить на Форме 1:\n"
-                    "• Длина сооружения\n"
-                    "• Ширина тротуаров T1 и/или T2"
-                )
-                return
-            area = length * (t1 + t2)
-            self.qty_entry.delete(0, tk.END)
-            self.qty_entry.insert(0, f"{area:.2f}".replace(".", ","))
+    def _apply_bulk(self, label: str, changes: dict):
+        changes = {
+            uid: fields for uid, fields in changes.items()
+            if any(self.project["defects"].get(uid).get(k, "") != v
+                   for k, v in fields.items())
+        }
+        if not changes:
+            self.status_label.config(text="Изменений нет")
+            self.root.after(2000, lambda: self.status_label.config(text=""))
+            return
 
-        # TODO: Enable BRIDGE_APPROACH_AREA after testing
-    
-        # elif rule == "BRIDGE_APPROACH_AREA":
-        #     approach_length1, approach_length2 = 25, 25
-        #     width1 = _to_float(bridge.get("approach_width1", "")) or 0.0
-        #     width2 = _to_float(bridge.get("approach_width2", "")) or 0.0
-        #     if width1 == 0.0 or width2 == 0.0:
-        #         messagebox.showwarning(
-        #             "Недостаточно данных",
-        #             "Для расчёта нужно заполнить на Форме 1:\n"
-        #             "• Ширина подхода 1\n"
-        #             "• Ширина подхода 2"
-        #         )
-        #         return
-        #     area = approach_length1 * width1 + approach_length2 * width2
-        #     self.qty_entry.delete(0, tk.END)
-        #     self.qty_entry.insert(0, f"{area:.2f}".replace(".", ","))
+        old = self._update_defects(changes)
+        self.history.push(
+            label,
+            undo=lambda: self._update_defects(old),
+            redo=lambda: self._update_defects(changes)
+        )
+        self.update_status_bar()
+        if not getattr(self, "is_loading", False):
+            self.is_dirty = True
+        self.status_label.config(text=f"{label}: изменено строк — {len(changes)}")
+        self.root.after(2000, lambda: self.status_label.config(text=""))
+
+    def bulk_set_field(self):
+        records = self._selected_records()
+        if not records:
+            return
+        labels = {label: key for key, label in BULK_FIELDS.items()}
+        dlg = BulkEditDialog(
+            self.root, "Задать значение поля",
+            [("field", "Поле:", BULK_FIELDS["action"], list(labels)),
+             ("value", "Значение:", "", None)],
+            note=f"Выделено строк: {len(records)}"
+        )
+        if not dlg.result:
+            return
 
+        field = labels[dlg.result["field"]]
+        value = dlg.result["value"].strip()
+        if field in ("safety", "durability", "repairability") and value \
+                and value not in ("0", "1", "2", "3", "4"):
+            messagebox.showerror("Ошибка", "Категории Б, Д, Р — число от 0 до 4")
+            return
+        if field == "loadcap" and value not in ("", "0", "1"):
+            messagebox.showerror("Ошибка", "Категория Г — 0 или 1")
+            return
 
-        else:
-            messagebox.showinfo("Расчёт", "Для этого дефекта расчёт не настроен.")
\ No newline at end of file
+        self._apply_bulk(
+            "Групповая правка",
+            {rec["uid"]: {field: value} for rec in records}
+        )
+
+    def bulk_find_replace(self):
+        records = self._selected_records()
+        if not records:
+            return
+        labels = {BULK_FIELDS[key]: key for key in BULK_TEXT_FIELDS}
+        dlg = BulkEditDialog(
+            self.root, "Найти и заменить",
+            [("field", "Столбец:", BULK_FIELDS["action"], list(labels)),
+             ("find", "Найти:", "", None),
+             ("replace", "Заменить на:", "", None)],
+            note=f"Выделено строк: {len(records)}"
+        )
+        if not dlg.result or not dlg.result["find"]:
+            return
+
+        field = labels[dlg.result["field"]]
+        find, repl = dlg.result["find"], dlg.result["replace"]
+        self._apply_bulk(
+            "Замена",
+            {rec["uid"]: {field: rec.get(field, "").replace(find, repl)}
+             for rec in records if find in rec.get(field, "")}
+        )
+
+    def bulk_renumber(self):
+        records = self._selected_records()
+        if not records:
+            return
+        dlg = BulkEditDialog(
+            self.root, "Перенумеровать местоположение",
+            [("pattern", "Шаблон:", "Пролёт {n}", None),
+             ("start", "Начать с:", "1", None),
+             ("step", "Шаг:", "1", None)],
+            note="{n} в шаблоне заменяется номером — по порядку строк в таблице"
+        )
+        if not dlg.result:
+            return
+        try:
+            start = int(dlg.result["start"])
+            step = int(dlg.result["step"])
+        except ValueError:
+            messagebox.showerror("Ошибка", "Начальный номер и шаг — целые числа")
+            return
+        pattern = dlg.result["pattern"]
+        if "{n}" not in pattern:
+            messagebox.showerror("Ошибка", "В шаблоне нет {n}")
+            return
+
+        self._apply_bulk(
+            "Перенумерация",
+            {rec["uid"]: {"location": pattern.replace("{n}", str(start + i * step))}
+             for i, rec in enumerate(records)}
+        )
+
+    def bulk_move_placement(self):
+        records = self._selected_records()
+        if not records:
+            return
+        placements = list(self.placement_cb["values"])
+        dlg = BulkEditDialog(
+            self.root, "Перенести в раздел",
+            [("placement", "Раздел:", records[0].get("placement", ""), placements)],
+            note=f"Выделено строк: {len(records)}"
+        )
+        if not dlg.result or not dlg.result["placement"]:
+            return
+
+        placement = dlg.result["placement"]
+        self._apply_bulk(
+            "Перенос в раздел",
+            {rec["uid"]: {"placement": placement} for rec in records}
+        )
+
+    def calculate_qty(self):
+        # Правила расчёта объёмов дефектов: см. qty_rules.py и docs/defects_qty_rules.txt
+        try:
+            rule = get_rule(getattr(self, "current_qty_rule", ""), strict=True)
+        except ValueError as e:
+            messagebox.showerror("Ошибка в правиле расчёта", str(e))
+            return
+        if rule is None:
+            messagebox.showinfo("Расчёт", "Для этого дефекта расчёт не настроен.")
+            return
+
+        value = rule.compute(self.project)
+        if value is None:
+            messagebox.showwarning("Недостаточно данных", rule.missing)
+            return
+
+        qty = format_qty(value)
+        self.qty_entry.delete(0, tk.END)
+        self.qty_entry.insert(0, qty)
+        self._calculated_qty = (rule.code, qty)
+
+        self.apply_measured_value()
+
+    def schedule_qty_recalc(self, field: str):
+        """
+        Поле Формы 1 / листа ПС или опоры изменилось ("bridge.length",
+        "spans.*" — лист добавлен или удалён). Пересчёт откладывается,
+        чтобы набор числа по символу давал один проход, а не десять.
+        """
+        if not self.qty_dependents.watches(field):
+            return
+        self._qty_changed.add(field)
+        if self._qty_job is not None:
+            self.root.after_cancel(self._qty_job)
+        self._qty_job = self.root.after(400, self.recalc_dependent_qty)
+
+    def recalc_dependent_qty(self):
+        """Пересчитывает количество у записей, зависящих от изменённых полей"""
+        self._qty_job = None
+        self._finish_defect_loading()
+        fields, self._qty_changed = self._qty_changed, set()
+        changes = self.qty_dependents.recompute(self.project, fields)
+        if not changes:
+            return
+        self._update_defects(changes)
+        self.status_label.config(text=f"Пересчитано количество: {len(changes)}")
+        self.root.after(2000, lambda: self.status_label.config(text=""))
@@ -89,6 +89,8 @@ class GeneralTabMixin:
                 self.project["bridge"][key] = var.get()
                 if not getattr(self, "is_loading", False):
                     self.is_dirty = True
+                    self._journal("bridge_set", key=key, value=var.get())
+                    self.schedule_qty_recalc(f"bridge.{key}")
 
             var.trace_add("write", on_change)
             self.bridge_vars[key] = var
@@ -1,10 +1,20 @@
 #tabs/tab_photos.py
 import os
+import threading
 import tkinter as tk
-import requests
-import certifi
 from tkinter import ttk, filedialog, messagebox
 from tabs.photo_viewer import PhotoViewerWindow
+from tabs.thumbnail_grid import ThumbnailGrid
+from thumbnail_cache import ThumbnailCache
+from folder_scan import photo_scanner
+from utils import generate_uid
+from map_snapshots import MapSnapshots, parse_coord
+from photo_metadata import PhotoMetaIndex, sort_by_time, gps_center
+
+MAP_PHOTO_FILENAME = "_map_bridge.png"
+
+PHOTO_SORT_NAME = "по имени"
+PHOTO_SORT_TIME = "по времени съёмки"
 
 
 class PhotosTabMixin:
@@ -58,6 +68,45 @@ class PhotosTabMixin:
             textvariable=self.cover_caption_var
         ).pack(fill="x", pady=2)
 
+        # ---------- МИНИАТЮРЫ ПАПКИ ----------
+        grid_frame = ttk.LabelFrame(frame, text="Фотографии папки", padding=10)
+        grid_frame.pack(fill="both", expand=True, pady=5)
+
+        sort_row = ttk.Frame(grid_frame)
+        sort_row.pack(fill="x", pady=(0, 5))
+        ttk.Label(sort_row, text="Порядок:").pack(side="left")
+        self.photo_sort_cb = ttk.Combobox(sort_row, state="readonly", width=20,
+                                          values=[PHOTO_SORT_NAME, PHOTO_SORT_TIME])
+        self.photo_sort_cb.set(PHOTO_SORT_NAME)
+        self.photo_sort_cb.pack(side="left", padx=5)
+        self.photo_sort_cb.bind("<<ComboboxSelected>>", lambda e: self.apply_photo_sort())
+        self.photo_recursive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sort_row, text="С подпапками", variable=self.photo_recursive_var,
+                        command=self.on_photo_recursive_toggled)\
+            .pack(side="left", padx=5)
+        self.photo_meta_label = ttk.Label(sort_row, text="", foreground="gray")
+        self.photo_meta_label.pack(side="left", padx=5)
+
+        self.map_snapshots = MapSnapshots()
+        self._map_thread = None
+
+        self.photo_meta_index = PhotoMetaIndex()
+        self.photo_meta = {}
+        self._photo_files = []
+        self._photo_meta_token = 0
+
+        self.thumb_cache = ThumbnailCache()
+        self.photo_grid = ThumbnailGrid(grid_frame, self.thumb_cache,
+                                        on_open=self.open_photo_viewer)
+        self.photo_grid.pack(fill="both", expand=True)
+
+        grid_btns = ttk.Frame(grid_frame)
+        grid_btns.pack(fill="x", pady=(5, 0))
+        ttk.Button(grid_btns, text="В отчёт", command=self.add_grid_photo_to_gallery)\
+            .pack(side="left")
+        ttk.Button(grid_btns, text="На титульный лист", command=self.set_grid_photo_as_cover)\
+            .pack(side="left", padx=5)
+
         # ---------- БЛОК ФОТОГРАФИЙ ----------
         gallery_frame = ttk.LabelFrame(frame, text="Фото конструкций и дефектов", padding=10)
         gallery_frame.pack(fill="both", expand=True, pady=5)
@@ -83,31 +132,148 @@ class PhotosTabMixin:
             .pack(side="left")
         ttk.Button(btns, text="Удалить", command=self.delete_gallery_photo)\
             .pack(side="left", padx=5)
-        def open_viewer():
-            folder = self.project.get("photos", {}).get("folder", "")
-            if not folder:
-                messagebox.showwarning(
-                    "Нет папки",
-                    "Сначала выберите папку с фотографиями"
-                )
-                return
-            PhotoViewerWindow(self.root, self.project, on_update=self._on_gallery_updated_from_viewer)
-        ttk.Button(btns, text="Просмотр фото", command=open_viewer)\
+        ttk.Button(btns, text="Просмотр фото", command=self.open_photo_viewer)\
     .pack(side="left", padx=10)
 
     # =====================================================
     # ЛОГИКА
     # =====================================================
-    def _on_gallery_updated_from_viewer(self):
-        self.refresh_gallery_table()
+    def open_photo_viewer(self, filename=None):
+        folder = self.project.get("photos", {}).get("folder", "")
+        if not folder:
+            messagebox.showwarning(
+                "Нет папки",
+                "Сначала выберите папку с фотографиями"
+            )
+            return
+        # порядок — как в сетке миниатюр (по имени или по времени съёмки)
+        files = self.photo_grid.files if self.photo_grid.folder == folder else None
+        PhotoViewerWindow(self.root, self.project, on_update=self._on_gallery_updated_from_viewer,
+                          start_file=filename, files=files)
+
+    def refresh_photo_grid(self):
+        self._ensure_photos_block()
+        folder = self.project["photos"].get("folder", "") or ""
+        files = self.list_photo_files(folder)
+        self._photo_files = files
+        self.photo_meta = {}
+        self.photo_grid.set_files(folder, files)
+        self._start_photo_meta_scan(folder, files)
+
+    def list_photo_files(self, folder: str) -> list:
+        """Фото папки через общий кэширующий сканер (с подпапками — по галке)"""
+        return photo_scanner.list(folder, recursive=self.photo_recursive_var.get())
+
+    def on_photo_recursive_toggled(self):
+        self.refresh_cover_controls()
+        self.refresh_photo_grid()
+
+    # --- EXIF: время съёмки, ориентация, GPS ---
+
+    def _start_photo_meta_scan(self, folder, files):
+        """EXIF читается в фоне; по готовности — сортировка и координаты"""
+        self._photo_meta_token += 1
+        token = self._photo_meta_token
+        if not files:
+            self.photo_meta_label.config(text="")
+            return
+
+        state = {"result": {}}
+
+        def worker():
+            try:
+                state["result"] = self.photo_meta_index.scan(folder, files)
+            except Exception:
+                state["result"] = {}
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.photo_meta_label.config(text="Чтение EXIF…")
+        self._poll_photo_meta(thread, state, token)
+
+    def _poll_photo_meta(self, thread, state, token):
+        if thread.is_alive():
+            self.root.after(100, lambda: self._poll_photo_meta(thread, state, token))
+            return
+        if token != self._photo_meta_token:
+            return  # папку уже сменили
+        self.photo_meta = state["result"]
+        dated = sum(1 for m in self.photo_meta.values() if m.get("time"))
+        self.photo_meta_label.config(text=f"С датой съёмки: {dated} из {len(self._photo_files)}")
+        if self.photo_sort_cb.get() == PHOTO_SORT_TIME:
+            self.apply_photo_sort()
+        self._prefill_coord_from_photos()
+
+    def apply_photo_sort(self):
+        files = self._photo_files
+        if self.photo_sort_cb.get() == PHOTO_SORT_TIME:
+            files = sort_by_time(files, self.photo_meta)
+        self.photo_grid.set_files(self.photo_grid.folder, files)
+
+    def _prefill_coord_from_photos(self):
+        """Координаты моста не заданы — берём среднюю точку снимков с GPS"""
+        var = getattr(self, "bridge_vars", {}).get("coord")
+        if var is None or var.get().strip():
+            return
+        center = gps_center(self.photo_meta)
+        if center is None:
+            return
+        var.set(f"{center[0]:.6f}, {center[1]:.6f}")
+        self.status_label.config(text="Координаты моста заполнены по GPS фотографий")
+        self.root.after(3000, lambda: self.status_label.config(text=""))
+
+    def add_grid_photo_to_gallery(self):
+        filename = self.photo_grid.selected_file()
+        if not filename:
+            return
+        gallery = self.project["photos"]["gallery"]
+        if any(rec.get("filename") == filename for rec in gallery):
+            messagebox.showinfo("Фото", "Это фото уже есть в отчёте")
+            return
+        rec = {"uid": generate_uid(), "filename": filename, "caption": ""}
+        gallery.append(rec)
+        self._gallery_row_insert(rec)
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+            self._journal("gallery_add", rec=rec)
+
+    def set_grid_photo_as_cover(self):
+        filename = self.photo_grid.selected_file()
+        if not filename:
+            return
+        self.cover_photo_cb.set(filename)
+        self.on_cover_selected()
+
+    def _on_gallery_updated_from_viewer(self, rec=None, action=None):
+        """action: "add" / "caption" / "remove" — меняем одну строку таблицы"""
+        if rec is None:
+            self.refresh_gallery_table()
+        elif action == "add":
+            self._gallery_row_insert(rec)
+        elif action == "remove":
+            self._gallery_row_delete(rec["uid"])
+        else:
+            self._gallery_row_update(rec)
+        if not getattr(self, "is_loading", False):
+            self.is_dirty = True
+            # в журнал — только изменённая запись, а не весь блок фото
+            if rec is None:
+                self._journal("photos_set", photos=self.project["photos"])
+            elif action == "add":
+                self._journal("gallery_add", rec=rec)
+            elif action == "remove":
+                self._journal("gallery_delete", uid=rec["uid"])
+            else:
+                self._journal("gallery_set", uid=rec["uid"],
+                              fields={"caption": rec.get("caption", "")})
     
     def _save_cover_caption(self):
             self._ensure_photos_block()
             self.project["photos"]["cover"]["caption"] = self.cover_caption_var.get()
             if not getattr(self, "is_loading", False):
                 self.is_dirty = True
+                self._journal("photos_field", key="cover",
+                              value=self.project["photos"]["cover"])
     
     def _start_edit_caption(self, event):
         region = self.photos_table.identify("region", event.x, event.y)
@@ -135,12 +301,15 @@ class PhotosTabMixin:
             new_text = entry.get()
             entry.destroy()
 
-            idx = int(row_id)
-            self.project["photos"]["gallery"][idx]["caption"] = new_text
-            self.refresh_gallery_table()
+            rec = self._gallery_record(row_id)
+            if rec is None or rec.get("caption", "") == new_text:
+                return
+            rec["caption"] = new_text
+            self._gallery_row_update(rec)
 
             if not getattr(self, "is_loading", False):
                 self.is_dirty = True
+                self._journal("gallery_set", uid=rec["uid"], fields={"caption": new_text})
 
         def cancel(_=None):
             entry.destroy()
@@ -163,6 +332,7 @@ class PhotosTabMixin:
         self.photos_folder_var.set(folder)
 
         self.refresh_cover_controls()
+        self.refresh_photo_grid()
         self.refresh_gallery_table()
 
     def select_photos_folder(self):
@@ -176,18 +346,17 @@ class PhotosTabMixin:
 
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+            self._journal("photos_field", key="folder", value=folder)
 
         self.refresh_cover_controls()
+        self.refresh_photo_grid()
         self.refresh_gallery_table()
 
     def refresh_cover_controls(self):
             self._ensure_photos_block()
             folder = self.project["photos"].get("folder", "") or ""
 
-            files = []
-            if folder and os.path.isdir(folder):
-                files = [f for f in os.listdir(folder) if f.lower().endswith((".jpg", ".jpeg", ".png"))]
-                files.sort(key=lambda s: s.lower())
+            files = self.list_photo_files(folder)
 
             self.cover_photo_cb["values"] = files
 
@@ -201,6 +370,8 @@ class PhotosTabMixin:
         self.project["photos"]["cover"]["filename"] = filename
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+            self._journal("photos_field", key="cover",
+                          value=self.project["photos"]["cover"])
 
     def add_gallery_photo(self):
         self._ensure_photos_block()
@@ -209,10 +380,7 @@ class PhotosTabMixin:
             messagebox.showwarning("Нет папки", "Сначала выберите папку с фотографиями")
             return
 
-        files = [
-            f for f in os.listdir(folder)
-            if f.lower().endswith((".jpg", ".jpeg", ".png"))
-        ]
+        files = self.list_photo_files(folder)
 
         if not files:
             return
@@ -229,14 +397,16 @@ class PhotosTabMixin:
 
         def add():
             rec = {
+                "uid": generate_uid(),
                 "filename": cb.get(),
                 "caption": caption_var.get()
             }
             self.project["photos"]["gallery"].append(rec)
-            self.refresh_gallery_table()
+            self._gallery_row_insert(rec)
             win.destroy()
             if not getattr(self, "is_loading", False):
                 self.is_dirty = True
+                self._journal("gallery_add", rec=rec)
 
         ttk.Button(win, text="Добавить", command=add).pack(pady=10)
 
@@ -245,32 +415,72 @@ class PhotosTabMixin:
         if not sel:
             return
 
-        try:
-            index = int(sel[0])
-        except ValueError:
+        rec = self._gallery_record(sel[0])
+        if rec is None:
             return
 
         gallery = self.project["photos"]["gallery"]
-        if index < 0 or index >= len(gallery):
-            return
-
-        del gallery[index]
-        self.refresh_gallery_table()
+        gallery[:] = [r for r in gallery if r is not rec]
+        self._gallery_row_delete(rec["uid"])
 
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+            self._journal("gallery_delete", uid=rec["uid"])
 
     def refresh_gallery_table(self):
+        for step in self.gallery_table_steps():
+            step()
+
+    # --- строки таблицы галереи: iid = uid записи ---
+
+    def _ensure_gallery_uids(self):
+        """Старые проекты: записи галереи без uid (или с повтором) получают новый"""
+        seen = set()
+        for rec in self.project["photos"]["gallery"]:
+            if not rec.get("uid") or rec["uid"] in seen:
+                rec["uid"] = generate_uid()
+            seen.add(rec["uid"])
+
+    def _gallery_record(self, uid):
+        return next((r for r in self.project["photos"]["gallery"] if r.get("uid") == uid), None)
+
+    @staticmethod
+    def _gallery_row_values(rec):
+        return rec.get("filename", ""), rec.get("caption", "")
+
+    def _gallery_row_insert(self, rec):
+        """Строка на место записи в списке галереи"""
+        index = next(i for i, r in enumerate(self.project["photos"]["gallery"]) if r is rec)
+        self.photos_table.insert("", index, iid=rec["uid"], values=self._gallery_row_values(rec))
+
+    def _gallery_row_update(self, rec):
+        if self.photos_table.exists(rec["uid"]):
+            self.photos_table.item(rec["uid"], values=self._gallery_row_values(rec))
+
+    def _gallery_row_delete(self, uid):
+        if self.photos_table.exists(uid):
+            self.photos_table.delete(uid)
+
+    def gallery_table_steps(self, chunk: int = 200) -> list:
+        """Заполнение таблицы галереи порциями по chunk строк"""
         self._ensure_photos_block()
-        self.photos_table.delete(*self.photos_table.get_children())
-
-        for i, rec in enumerate(self.project["photos"]["gallery"]):
-            self.photos_table.insert(
-                "",
-                "end",
-                iid=str(i),
-                values=(rec.get("filename", ""), rec.get("caption", ""))
-            )
+        self._ensure_gallery_uids()
+        gallery = self.project["photos"]["gallery"]
+
+        def fill(start):
+            for i in range(start, min(start + chunk, len(gallery))):
+                rec = gallery[i]
+                self.photos_table.insert(
+                    "",
+                    "end",
+                    iid=rec["uid"],
+                    values=self._gallery_row_values(rec)
+                )
+
+        steps = [lambda: self.photos_table.delete(*self.photos_table.get_children())]
+        for start in range(0, len(gallery), chunk):
+            steps.append(lambda start=start: fill(start))
+        return steps
 
     def create_map_photo(self):
         bridge = self.project.get("bridge", {})
@@ -291,29 +501,44 @@ class PhotosTabMixin:
             )
             return
 
-        lat, lon = [c.strip() for c in coord.split(",")]
-
-        url = (
-            "https://static-maps.yandex.ru/1.x/"
-            f"?ll={lon},{lat}"
-            "&z=15"
-            "&size=650,450"
-            "&l=map"
-            f"&pt={lon},{lat},pm2rdm"
-        )
-
-        filename = "_map_bridge.png"
-        path = os.path.join(folder, filename)
-
         try:
-            r = requests.get(url, timeout=20, verify=certifi.where())
-            r.raise_for_status()
-            with open(path, "wb") as f:
-                f.write(r.content)
-        except Exception as e:
+            point = parse_coord(coord)
+        except ValueError as e:
             messagebox.showerror("Ошибка карты", str(e))
             return
+        if self._map_thread is not None and self._map_thread.is_alive():
+            return
+
+        lat, lon = point
+        path = os.path.join(folder, MAP_PHOTO_FILENAME)
+        state = {"error": None}
+
+        def worker():
+            # сеть и запись файла — в фоне; повтор для тех же координат берётся из кэша
+            try:
+                data = self.map_snapshots.get(*point)
+                with open(path, "wb") as f:
+                    f.write(data)
+            except Exception as e:
+                state["error"] = e
+
+        self._map_thread = threading.Thread(target=worker, daemon=True)
+        self._map_thread.start()
+        self.status_label.config(text="Загрузка карты…")
+        self._poll_map_photo(state, folder, lat, lon)
+
+    def _poll_map_photo(self, state, folder, lat, lon):
+        if self._map_thread.is_alive():
+            self.root.after(100, lambda: self._poll_map_photo(state, folder, lat, lon))
+            return
+        self.status_label.config(text="")
+        if state["error"] is not None:
+            messagebox.showerror("Ошибка карты", str(state["error"]))
+            return
+        if self.project.get("photos", {}).get("folder", "") != folder:
+            return  # пока грузили, сменили папку или проект
 
+        filename = MAP_PHOTO_FILENAME
         caption = (
             "Ситуационный план расположения моста.\n"
             f"Координаты расположения моста ({lat}, {lon})"
@@ -325,14 +550,19 @@ class PhotosTabMixin:
         for rec in gallery:
             if rec["filename"] == filename:
                 rec["caption"] = caption
+                self._gallery_row_update(rec)
+                op = {"op": "gallery_set", "uid": rec["uid"], "fields": {"caption": caption}}
                 break
         else:
-            gallery.insert(0, {
+            rec = {
+                "uid": generate_uid(),
                 "filename": filename,
                 "caption": caption
-            })
-
-        self.refresh_gallery_table()
+            }
+            gallery.insert(0, rec)
+            self._gallery_row_insert(rec)
+            op = {"op": "gallery_add", "rec": rec, "index": 0}
 
         if not getattr(self, "is_loading", False):
-            self.is_dirty = True
\ No newline at end of file
+            self.is_dirty = True
+            self._journal(**op)
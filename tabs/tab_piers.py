@@ -28,24 +28,28 @@ class PiersTabMixin:
         self.rebuild_pier_tabs()
 
     def rebuild_pier_tabs(self):
-        self.project.setdefault("piers", [])
+        for step in self.pier_tab_steps():
+            step()
 
-        for tab_id in self.piers_notebook.tabs():
-            self.piers_notebook.forget(tab_id)
+    def pier_tab_steps(self) -> list:
+        """Перестройка листов опор по шагам (по листу на шаг) — для поэтапной загрузки"""
+        self.project.setdefault("piers", [])
 
-        self.pier_forms.clear()
+        def clear():
+            for tab_id in self.piers_notebook.tabs():
+                self.piers_notebook.forget(tab_id)
+            self.pier_forms.clear()
 
         if not self.project["piers"]:
-            self.add_pier_form()
-            return
+            return [clear, self._add_pier_placeholder]
 
+        steps = [clear]
         for item in self.project["piers"]:
-            uid = item.get("uid")
-            if not uid:
-                continue
-            self._create_pier_tab_for_item(item)
+            if item.get("uid"):
+                steps.append(lambda item=item: self._create_pier_tab_for_item(item))
+        return steps
 
-    def add_pier_form(self):
+    def add_pier_form(self, record_history: bool = True):
         self.project.setdefault("piers", [])
 
         uid = self._generate_uid()
@@ -78,7 +82,19 @@ class PiersTabMixin:
 
         self.project["piers"].append(item)
         if not getattr(self, "is_loading", False):
+            self._journal("item_add", section="piers", item=item)
             self.is_dirty = True
+            self.schedule_qty_recalc("piers.*")
+            if record_history:
+                index = len(self.project["piers"]) - 1
+                self.history.push(
+                    "Добавление опоры",
+                    undo=lambda: self._remove_pier(uid),
+                    redo=lambda: self._insert_pier(index, item)
+                )
+        else:
+            # лист-заглушка при загрузке: в журнал попадёт перед первой правкой
+            self._placeholder_items[uid] = item
 
         self._create_pier_tab_for_item(item)
         self.piers_notebook.select(self.pier_forms[uid]["tab"])
@@ -100,10 +116,48 @@ class PiersTabMixin:
         if not messagebox.askyesno("Удалить опору", "Удалить текущий лист опоры?"):
             return
 
-        self.project["piers"] = [x for x in self.project["piers"] if x.get("uid") != uid_to_delete]
+        index, item = self._remove_pier(uid_to_delete)
+        self.history.push(
+            "Удаление опоры",
+            undo=lambda: self._insert_pier(index, item),
+            redo=lambda: self._remove_pier(uid_to_delete)
+        )
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+
+    def _add_pier_placeholder(self):
+        """Пустой лист, когда листов опор не осталось; отмена удаления его уберёт"""
+        self.add_pier_form(record_history=False)
+        if not getattr(self, "is_loading", False):
+            # удалён последний лист — при отмене удаления заглушку уберём
+            self._pier_placeholder_uid = self.project["piers"][-1]["uid"]
+
+    def _insert_pier(self, index: int, item: dict):
+        """Возвращает лист на прежнее место (отмена удаления / повтор добавления)"""
+        placeholder = getattr(self, "_pier_placeholder_uid", None)
+        self._pier_placeholder_uid = None
+        items = self.project["piers"]
+        if placeholder is not None and any(x.get("uid") == placeholder for x in items):
+            # нетронутая заглушка больше не нужна — лист возвращается
+            items[:] = [x for x in items if x.get("uid") != placeholder]
+            self._journal("item_delete", section="piers", uid=placeholder)
+            index = min(index, len(items))
+        items.insert(index, item)
+        self._journal("item_add", section="piers", item=item, index=index)
+        self.schedule_qty_recalc("piers.*")
+        self.rebuild_pier_tabs()
+        if item["uid"] in self.pier_forms:
+            self.piers_notebook.select(self.pier_forms[item["uid"]]["tab"])
+
+    def _remove_pier(self, uid: str):
+        """Убирает лист по uid, возвращает (позиция, запись) для отмены"""
+        items = self.project["piers"]
+        index = next(i for i, x in enumerate(items) if x.get("uid") == uid)
+        item = items.pop(index)
+        self._journal("item_delete", section="piers", uid=uid)
+        self.schedule_qty_recalc("piers.*")
         self.rebuild_pier_tabs()
+        return index, item
 
     def _create_pier_tab_for_item(self, item: dict):
         uid = item["uid"]
@@ -122,6 +176,11 @@ class PiersTabMixin:
                 item[key] = var.get()
                 if not getattr(self, "is_loading", False):
                     self.is_dirty = True
+                    if uid == getattr(self, "_pier_placeholder_uid", None):
+                        self._pier_placeholder_uid = None  # заглушку заполняют — оставляем
+                    self._journal("item_set", section="piers", uid=uid,
+                                  key=key, value=var.get())
+                    self.schedule_qty_recalc(f"piers.{key}")
                 if key == "title":
                     try:
                         tab_index = self.piers_notebook.index(tab)
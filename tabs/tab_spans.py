@@ -40,22 +40,26 @@ class SpansTabMixin:
         self.rebuild_span_tabs()
 
     def rebuild_span_tabs(self):
-        for tab_id in self.spans_notebook.tabs():
-            self.spans_notebook.forget(tab_id)
+        for step in self.span_tab_steps():
+            step()
 
-        self.span_forms.clear()
+    def span_tab_steps(self) -> list:
+        """Перестройка листов ПС по шагам (по листу на шаг) — для поэтапной загрузки"""
+        def clear():
+            for tab_id in self.spans_notebook.tabs():
+                self.spans_notebook.forget(tab_id)
+            self.span_forms.clear()
 
         if not self.project.get("spans"):
-            self.add_span_form()
-            return
+            return [clear, self._add_span_placeholder]
 
+        steps = [clear]
         for st in self.project["spans"]:
-            uid = st.get("uid")
-            if not uid:
-                continue
-            self._create_span_tab_for_item(st)
+            if st.get("uid"):
+                steps.append(lambda st=st: self._create_span_tab_for_item(st))
+        return steps
 
-    def add_span_form(self):
+    def add_span_form(self, record_history: bool = True):
         uid = self._generate_uid()
         index = len(self.project["spans"]) + 1
 
@@ -104,7 +108,19 @@ class SpansTabMixin:
 
         self.project["spans"].append(item)
         if not getattr(self, "is_loading", False):
+            self._journal("item_add", section="spans", item=item)
             self.is_dirty = True
+            self.schedule_qty_recalc("spans.*")
+            if record_history:
+                index = len(self.project["spans"]) - 1
+                self.history.push(
+                    "Добавление ПС",
+                    undo=lambda: self._remove_span(uid),
+                    redo=lambda: self._insert_span(index, item)
+                )
+        else:
+            # лист-заглушка при загрузке: в журнал попадёт перед первой правкой
+            self._placeholder_items[uid] = item
 
         self._create_span_tab_for_item(item)
         self.spans_notebook.select(self.span_forms[uid]["tab"])
@@ -127,12 +143,48 @@ class SpansTabMixin:
                                    "Удалить текущий лист пролётного строения?"):
             return
 
-        self.project["spans"] = [
-            x for x in self.project["spans"] if x.get("uid") != uid_to_delete
-        ]
+        index, item = self._remove_span(uid_to_delete)
+        self.history.push(
+            "Удаление ПС",
+            undo=lambda: self._insert_span(index, item),
+            redo=lambda: self._remove_span(uid_to_delete)
+        )
         if not getattr(self, "is_loading", False):
             self.is_dirty = True
+
+    def _add_span_placeholder(self):
+        """Пустой лист, когда листов ПС не осталось; отмена удаления его уберёт"""
+        self.add_span_form(record_history=False)
+        if not getattr(self, "is_loading", False):
+            # удалён последний лист — при отмене удаления заглушку уберём
+            self._span_placeholder_uid = self.project["spans"][-1]["uid"]
+
+    def _insert_span(self, index: int, item: dict):
+        """Возвращает лист на прежнее место (отмена удаления / повтор добавления)"""
+        placeholder = getattr(self, "_span_placeholder_uid", None)
+        self._span_placeholder_uid = None
+        items = self.project["spans"]
+        if placeholder is not None and any(x.get("uid") == placeholder for x in items):
+            # нетронутая заглушка больше не нужна — лист возвращается
+            items[:] = [x for x in items if x.get("uid") != placeholder]
+            self._journal("item_delete", section="spans", uid=placeholder)
+            index = min(index, len(items))
+        items.insert(index, item)
+        self._journal("item_add", section="spans", item=item, index=index)
+        self.schedule_qty_recalc("spans.*")
+        self.rebuild_span_tabs()
+        if item["uid"] in self.span_forms:
+            self.spans_notebook.select(self.span_forms[item["uid"]]["tab"])
+
+    def _remove_span(self, uid: str):
+        """Убирает лист по uid, возвращает (позиция, запись) для отмены"""
+        items = self.project["spans"]
+        index = next(i for i, x in enumerate(items) if x.get("uid") == uid)
+        item = items.pop(index)
+        self._journal("item_delete", section="spans", uid=uid)
+        self.schedule_qty_recalc("spans.*")
         self.rebuild_span_tabs()
+        return index, item
 
     def _create_span_tab_for_item(self, item: dict):
         uid = item["uid"]
@@ -152,6 +204,11 @@ class SpansTabMixin:
                 item[key] = var.get()
                 if not getattr(self, "is_loading", False):
                     self.is_dirty = True
+                    if uid == getattr(self, "_span_placeholder_uid", None):
+                        self._span_placeholder_uid = None  # заглушку заполняют — оставляем
+                    self._journal("item_set", section="spans", uid=uid,
+                                  key=key, value=var.get())
+                    self.schedule_qty_recalc(f"spans.{key}")
                 if key == "title":
                     try:
                         tab_index = self.spans_notebook.index(tab)
@@ -0,0 +1,212 @@
+# tabs/thumbnail_grid.py
+import os
+import sys
+import tkinter as tk
+from tkinter import ttk
+from PIL import ImageTk
+
+
+class ThumbnailGrid(ttk.Frame):
+    """
+    Прокручиваемая сетка миниатюр папки на Canvas.
+
+    Элементы холста и PhotoImage создаются только для ячеек в видимой
+    области; ушедшие из вида ячейки удаляются, их задачи в пуле
+    снимаются. Миниатюры строит ThumbnailCache в фоне, сетка забирает
+    готовые по таймеру и подставляет в ячейки, которые ещё видны.
+    """
+
+    PAD = 6
+    LABEL_H = 18
+
+    def __init__(self, master, cache, on_open=None, on_select=None, height=240):
+        super().__init__(master)
+        self.cache = cache
+        self.on_open = on_open
+        self.on_select = on_select
+        self.folder = ""
+        self.files = []
+        self.selected = None          # индекс выделенной ячейки
+        self._index = {}              # путь -> индекс ячейки
+        self._cells = {}              # индекс -> тег элементов на холсте
+        self._photos = {}             # индекс -> PhotoImage (только видимые)
+        self._columns = 1
+        self._render_job = None
+        self._poll_job = None
+
+        self.canvas = tk.Canvas(self, height=height, highlightthickness=0,
+                                yscrollincrement=20)
+        vbar = ttk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.canvas.configure(yscrollcommand=vbar.set)
+        vbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self._schedule_render(relayout=True))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-1>", self._on_double_click)
+        self.canvas.bind("<Enter>", self._bind_wheel)
+        self.canvas.bind("<Leave>", self._unbind_wheel)
+
+    # ---------- данные ----------
+
+    @property
+    def cell_w(self) -> int:
+        return self.cache.size + 2 * self.PAD
+
+    @property
+    def cell_h(self) -> int:
+        return self.cache.size + self.LABEL_H + 2 * self.PAD
+
+    def set_files(self, folder: str, files):
+        self.folder = folder
+        self.files = list(files)
+        self._index = {os.path.join(folder, f): i for i, f in enumerate(self.files)}
+        self.selected = None
+        self._clear_cells()
+        self.canvas.yview_moveto(0)
+        self._schedule_render(relayout=True)
+
+    def selected_file(self):
+        if self.selected is None or self.selected >= len(self.files):
+            return None
+        return self.files[self.selected]
+
+    # ---------- прокрутка ----------
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_render()
+
+    def _on_wheel(self, event):
+        if sys.platform == "darwin":
+            self.canvas.yview_scroll(int(-1 * event.delta), "units")
+        else:
+            self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self._schedule_render()
+
+    def _bind_wheel(self, _=None):
+        self.canvas.bind_all("<MouseWheel>", self._on_wheel)
+        self.canvas.bind_all("<Button-4>", lambda e: self._yview("scroll", -1, "units"))
+        self.canvas.bind_all("<Button-5>", lambda e: self._yview("scroll", 1, "units"))
+
+    def _unbind_wheel(self, _=None):
+        self.canvas.unbind_all("<MouseWheel>")
+        self.canvas.unbind_all("<Button-4>")
+        self.canvas.unbind_all("<Button-5>")
+
+    # ---------- отрисовка видимых ячеек ----------
+
+    def _schedule_render(self, relayout=False):
+        if relayout:
+            columns = max(1, self.canvas.winfo_width() // self.cell_w)
+            if columns != self._columns:
+                self._columns = columns
+                self._clear_cells()
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _clear_cells(self):
+        self.canvas.delete("all")
+        self._cells.clear()
+        self._photos.clear()
+
+    def _render(self):
+        self._render_job = None
+        cols = self._columns
+        rows = (len(self.files) + cols - 1) // cols
+        self.canvas.configure(scrollregion=(0, 0, cols * self.cell_w, rows * self.cell_h))
+
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), 1)
+        first = int(top // self.cell_h) * cols
+        last = min(len(self.files), (int((top + height) // self.cell_h) + 1) * cols)
+        visible = set(range(first, last))
+
+        for i in [i for i in self._cells if i not in visible]:
+            self.canvas.delete(self._cells.pop(i))
+            self._photos.pop(i, None)
+
+        for i in range(first, last):
+            if i not in self._cells:
+                self._create_cell(i)
+
+        # на экран вперёд — чтобы прокрутка вниз не упиралась в пустые ячейки
+        ahead = range(last, min(len(self.files), last + (last - first)))
+        wanted = [os.path.join(self.folder, self.files[i]) for i in range(first, last)]
+        wanted += [os.path.join(self.folder, self.files[i]) for i in ahead]
+        for path in wanted:
+            if self.cache.get_memory(path) is None:
+                self.cache.request(path)
+        self.cache.cancel_except(set(wanted))
+        self._start_poll()
+
+    def _create_cell(self, i: int):
+        cols, size = self._columns, self.cache.size
+        x = (i % cols) * self.cell_w + self.PAD
+        y = (i // cols) * self.cell_h + self.PAD
+        tag = f"cell{i}"
+        self.canvas.create_rectangle(
+            x - 2, y - 2, x + size + 2, y + size + self.LABEL_H,
+            outline="#3874d8" if i == self.selected else "",
+            width=2, tags=(tag, f"{tag}_frame"))
+        name = self.files[i]
+        if len(name) > 22:
+            name = name[:10] + "…" + name[-10:]
+        self.canvas.create_text(x + size // 2, y + size + self.LABEL_H // 2 - 1,
+                                text=name, tags=(tag,))
+        self._cells[i] = tag
+
+        img = self.cache.get_memory(os.path.join(self.folder, self.files[i]))
+        if img is not None:
+            self._set_image(i, img)
+
+    def _set_image(self, i: int, img):
+        tag = self._cells.get(i)
+        if tag is None or i in self._photos:
+            return
+        size = self.cache.size
+        x = (i % self._columns) * self.cell_w + self.PAD + size // 2
+        y = (i // self._columns) * self.cell_h + self.PAD + size // 2
+        photo = ImageTk.PhotoImage(img)
+        self._photos[i] = photo
+        self.canvas.create_image(x, y, image=photo, tags=(tag,))
+
+    # ---------- готовые миниатюры ----------
+
+    def _start_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.after(40, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        for path, img in self.cache.poll():
+            i = self._index.get(path)
+            if img is not None and i is not None:
+                self._set_image(i, img)
+        if self.cache.busy:
+            self._start_poll()
+
+    # ---------- выделение ----------
+
+    def _cell_at(self, event):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        col, row = int(x // self.cell_w), int(y // self.cell_h)
+        if col >= self._columns:
+            return None
+        i = row * self._columns + col
+        return i if 0 <= i < len(self.files) else None
+
+    def _on_click(self, event):
+        i = self._cell_at(event)
+        if self.selected is not None and self.selected in self._cells:
+            self.canvas.itemconfigure(f"cell{self.selected}_frame", outline="")
+        self.selected = i
+        if i is not None:
+            self.canvas.itemconfigure(f"cell{i}_frame", outline="#3874d8")
+            if self.on_select:
+                self.on_select(self.files[i])
+
+    def _on_double_click(self, event):
+        i = self._cell_at(event)
+        if i is not None and self.on_open:
+            self.on_open(self.files[i])
@@ -0,0 +1,210 @@
+# tabs/virtual_table.py
+from tkinter import ttk
+
+# Shift / Control в event.state — выделение расширяется, а не заменяется
+_EXTEND_MASK = 0x0001 | 0x0004
+
+
+class VirtualTable(ttk.Treeview):
+    """
+    Treeview, в котором созданы только видимые строки.
+
+    Данные не копируются в виджет: rows() возвращает текущий список записей
+    (например, project["defects"]), row_values(rec) — значения колонок,
+    key(rec) — iid строки. После изменения списка достаточно вызвать
+    refresh(): перерисовка откладывается до простоя и затрагивает только
+    строки в окне, поэтому вставка/удаление/правка не зависят от размера
+    проекта. Выделение хранится по ключам и переживает прокрутку.
+    """
+
+    def __init__(self, master, rows, row_values, key=None,
+                 yscrollcommand=None, **kw):
+        super().__init__(master, **kw)
+        self._rows = rows
+        self._row_values = row_values
+        self._key = key or (lambda rec: rec.get("uid"))
+        self._yscrollcommand = yscrollcommand
+
+        self._first = 0          # индекс первой видимой записи
+        self._materialized = []  # ключи строк, созданных в Treeview
+        self._selected = set()
+        self._render_job = None
+        self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        self._header_height = self._row_height
+
+        self.bind("<Configure>", lambda e: self.refresh(), add="+")
+        self.bind("<Button-1>", self._on_click, add="+")
+        self.bind("<Up>", lambda e: self._step(-1, e))
+        self.bind("<Down>", lambda e: self._step(1, e))
+        self.bind("<Prior>", lambda e: self._page(-1))
+        self.bind("<Next>", lambda e: self._page(1))
+        self.bind("<Home>", lambda e: self._jump(0))
+        self.bind("<End>", lambda e: self._jump(len(self._rows())))
+
+    # ---------- данные ----------
+
+    def refresh(self):
+        """Список записей изменился — перерисовать видимое окно при простое"""
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _visible_count(self) -> int:
+        height = self.winfo_height() - self._header_height
+        return max(1, height // self._row_height)
+
+    def _clamp_first(self, total: int, visible: int):
+        self._first = max(0, min(self._first, total - visible))
+
+    def _render(self):
+        self._render_job = None
+        self._sync_selection()
+
+        rows = self._rows()
+        total = len(rows)
+        visible = self._visible_count()
+        self._clamp_first(total, visible)
+
+        window = []
+        used = set()
+        for i in range(self._first, min(total, self._first + visible)):
+            rec = rows[i]
+            key = self._key(rec)
+            if not key or key in used:
+                key = f"#{i}"
+            used.add(key)
+            window.append((key, self._row_values(rec)))
+
+        # строки, оставшиеся в окне, переиспользуем — меняем только значения
+        stale = [k for k in self._materialized if k not in used]
+        if stale:
+            super().delete(*stale)
+        kept = set(self._materialized) - set(stale)
+        for pos, (key, values) in enumerate(window):
+            if key in kept:
+                self.item(key, values=values)
+                self.move(key, "", pos)
+            else:
+                self.insert("", pos, iid=key, values=values)
+        self._materialized = [k for k, _ in window]
+
+        # Treeview не должен прокручиваться сам — окно задаём мы
+        super().yview_moveto(0)
+        super().selection_set([k for k in self._materialized if k in self._selected])
+
+        if self._materialized:
+            bbox = self.bbox(self._materialized[0])
+            if bbox:
+                self._header_height = bbox[1]
+
+        if self._yscrollcommand is not None:
+            if total:
+                lo = self._first / total
+                hi = min(1.0, (self._first + visible) / total)
+            else:
+                lo, hi = 0.0, 1.0
+            self._yscrollcommand(lo, hi)
+
+    # ---------- прокрутка ----------
+
+    def yview(self, *args):
+        total = len(self._rows())
+        visible = self._visible_count()
+        if not args:
+            if not total:
+                return 0.0, 1.0
+            return self._first / total, min(1.0, (self._first + visible) / total)
+
+        if args[0] == "moveto":
+            self._first = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= visible
+            self._first += step
+        self._clamp_first(total, visible)
+        self._render()
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
+    def yview_moveto(self, fraction):
+        self.yview("moveto", fraction)
+
+    def see(self, key):
+        """Прокручивает к записи с ключом key (поиск по списку — O(n))"""
+        for i, rec in enumerate(self._rows()):
+            if self._key(rec) == key:
+                visible = self._visible_count()
+                if not self._first <= i < self._first + visible:
+                    self._first = i - visible // 2
+                self._render()
+                return
+
+    def _page(self, direction: int):
+        self.yview_scroll(direction, "pages")
+        return "break"
+
+    def _jump(self, index: int):
+        self._first = index
+        self._clamp_first(len(self._rows()), self._visible_count())
+        self._render()
+        return "break"
+
+    def _step(self, delta: int, event):
+        """Стрелки на краю окна прокручивают список на одну строку"""
+        items = self._materialized
+        focus = self.focus()
+        if focus not in items:
+            return None
+        pos = items.index(focus)
+        at_edge = (delta < 0 and pos == 0) or (delta > 0 and pos == len(items) - 1)
+        if not at_edge:
+            if not event.state & _EXTEND_MASK:
+                self._selected.clear()
+            return None
+
+        old_first = self._first
+        self._first += delta
+        self._clamp_first(len(self._rows()), self._visible_count())
+        if self._first == old_first:
+            return "break"
+
+        if not event.state & _EXTEND_MASK:
+            self._selected.clear()
+            super().selection_set(())
+        self._render()
+        target = self._materialized[pos]
+        self.focus(target)
+        super().selection_add(target)
+        self._selected.add(target)
+        return "break"
+
+    # ---------- выделение ----------
+
+    def _on_click(self, event):
+        # обычный щелчок заменяет выделение, в т.ч. строк вне окна
+        if not event.state & _EXTEND_MASK:
+            self._selected.clear()
+
+    def _sync_selection(self):
+        shown = set(self._materialized)
+        self._selected = (self._selected - shown) | set(super().selection())
+
+    def selection(self):
+        """Ключи всех выделенных записей, включая прокрученные за окно"""
+        self._sync_selection()
+        if self._selected <= set(self._materialized):
+            return tuple(self._selected)
+        existing = {self._key(rec) for rec in self._rows()}
+        self._selected &= existing
+        return tuple(self._selected)
+
+    def selection_set(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        self._selected = set(items)
+        super().selection_set([k for k in self._materialized if k in self._selected])
+
+    def selection_clear(self):
+        self._selected.clear()
+        super().selection_set(())
@@ -0,0 +1,261 @@
+# tabs/workspace_dialog.py
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from workspace_index import WorkspaceIndex, format_categories
+from map_snapshots import MapSnapshots
+
+
+class WorkspaceDialog(tk.Toplevel):
+    """
+    Окно «Открыть из рабочей папки»: индексирует папку с проектами
+    в фоне и ищет мосты по ID, дороге, км-привязке, координатам и датам.
+    """
+
+    def __init__(self, master, on_open):
+        super().__init__(master)
+        self.title("Открыть из рабочей папки")
+        self.geometry("1000x520")
+        self.on_open = on_open
+
+        self.index = WorkspaceIndex()
+        self.folder_var = tk.StringVar(value=self.index.get_setting("workspace_root"))
+        self.search_var = tk.StringVar()
+        self._scan_thread = None
+        self._scan_state = {}
+        self._maps_thread = None
+        self._maps_state = {}
+        self._search_job = None
+        self._closed = False
+
+        self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.refresh_results()
+        if self.folder_var.get():
+            self.start_scan()
+
+    def _build_ui(self):
+        top = ttk.Frame(self, padding=10)
+        top.pack(fill="x")
+
+        ttk.Label(top, text="Папка:").pack(side="left")
+        ttk.Entry(top, textvariable=self.folder_var, state="readonly")\
+            .pack(side="left", fill="x", expand=True, padx=6)
+        ttk.Button(top, text="Выбрать папку", command=self.select_folder)\
+            .pack(side="left")
+        ttk.Button(top, text="Обновить индекс", command=self.start_scan)\
+            .pack(side="left", padx=(6, 0))
+        ttk.Button(top, text="Подготовить карты", command=self.start_maps)\
+            .pack(side="left", padx=(6, 0))
+
+        search = ttk.Frame(self, padding=(10, 0))
+        search.pack(fill="x")
+        ttk.Label(search, text="Поиск (ID, дорога, км, координаты, дата):")\
+            .pack(side="left")
+        entry = ttk.Entry(search, textvariable=self.search_var)
+        entry.pack(side="left", fill="x", expand=True, padx=6)
+        entry.focus_set()
+        self.search_var.trace_add("write", lambda *_: self._schedule_search())
+
+        table_frame = ttk.Frame(self, padding=10)
+        table_frame.pack(fill="both", expand=True)
+
+        columns = {
+            "bridge_id": ("ID", 80),
+            "road": ("Дорога", 220),
+            "km": ("Км", 80),
+            "coord": ("Координаты", 150),
+            "inspection_current": ("Обследование", 100),
+            "defects": ("Дефекты", 180),
+            "file": ("Файл", 200),
+        }
+        self.results = ttk.Treeview(table_frame, columns=tuple(columns),
+                                    show="headings")
+        for col, (title, width) in columns.items():
+            self.results.heading(col, text=title)
+            self.results.column(col, width=width, minwidth=50)
+
+        vbar = ttk.Scrollbar(table_frame, orient="vertical",
+                             command=self.results.yview)
+        self.results.configure(yscrollcommand=vbar.set)
+        vbar.pack(side="right", fill="y")
+        self.results.pack(fill="both", expand=True)
+        self.results.bind("<Double-1>", lambda e: self.open_selected())
+        self.results.bind("<Return>", lambda e: self.open_selected())
+
+        bottom = ttk.Frame(self, padding=(10, 0, 10, 10))
+        bottom.pack(fill="x")
+        self.status_label = ttk.Label(bottom, text="")
+        self.status_label.pack(side="left")
+        ttk.Button(bottom, text="Открыть", command=self.open_selected)\
+            .pack(side="right")
+
+    # ---------- индексация ----------
+
+    def select_folder(self):
+        folder = filedialog.askdirectory(parent=self)
+        if not folder:
+            return
+        self.folder_var.set(folder)
+        self.index.set_setting("workspace_root", folder)
+        self.refresh_results()
+        self.start_scan()
+
+    def start_scan(self):
+        folder = self.folder_var.get()
+        if not folder or not os.path.isdir(folder):
+            return
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return
+
+        state = {"done": 0, "total": 0, "result": None, "error": None,
+                 "cancel": False}
+        self._scan_state = state
+
+        def worker():
+            # у фонового потока своё подключение к индексу
+            index = WorkspaceIndex()
+            try:
+                state["result"] = index.scan(
+                    folder,
+                    progress=lambda done, total: state.update(done=done, total=total),
+                    cancel=lambda: state["cancel"]
+                )
+            except Exception as e:
+                state["error"] = e
+            finally:
+                index.close()
+
+        self._scan_thread = threading.Thread(target=worker, daemon=True)
+        self._scan_thread.start()
+        self._poll_scan()
+
+    def _poll_scan(self):
+        if self._closed:
+            return
+        state = self._scan_state
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            if state["total"]:
+                self.status_label.config(
+                    text=f"Индексация: {state['done']} / {state['total']}")
+            else:
+                self.status_label.config(text="Индексация…")
+            self.after(200, self._poll_scan)
+            return
+
+        if state.get("error") is not None:
+            self.status_label.config(text=f"Ошибка индексации: {state['error']}")
+        elif state.get("result"):
+            r = state["result"]
+            self.status_label.config(
+                text=f"Обновлено: {r['parsed']}, без изменений: {r['unchanged']}, "
+                     f"удалено: {r['removed']}")
+        self.refresh_results()
+
+    # ---------- карты ----------
+
+    def start_maps(self):
+        """Заранее загрузить в кэш карты всех мостов рабочей папки"""
+        folder = self.folder_var.get()
+        if not folder:
+            return
+        if self._maps_thread is not None and self._maps_thread.is_alive():
+            return
+        coords = self.index.coordinates(folder)
+        if not coords:
+            self.status_label.config(text="В индексе нет мостов с координатами")
+            return
+
+        state = {"done": 0, "total": 0, "result": None, "error": None,
+                 "cancel": False}
+        self._maps_state = state
+
+        def worker():
+            try:
+                state["result"] = MapSnapshots().pregenerate(
+                    coords,
+                    progress=lambda done, total: state.update(done=done, total=total),
+                    cancel=lambda: state["cancel"]
+                )
+            except Exception as e:
+                state["error"] = e
+
+        self._maps_thread = threading.Thread(target=worker, daemon=True)
+        self._maps_thread.start()
+        self._poll_maps()
+
+    def _poll_maps(self):
+        if self._closed:
+            return
+        state = self._maps_state
+        if self._maps_thread.is_alive():
+            self.status_label.config(
+                text=f"Карты: {state['done']} / {state['total'] or '…'}")
+            self.after(200, self._poll_maps)
+            return
+
+        if state["error"] is not None:
+            self.status_label.config(text=f"Ошибка карт: {state['error']}")
+        elif state["result"]:
+            r = state["result"]
+            self.status_label.config(
+                text=f"Карты загружены: {r['fetched']}, уже в кэше: {r['cached']}, "
+                     f"ошибок: {r['failed']}")
+
+    # ---------- поиск ----------
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(150, self.refresh_results)
+
+    def refresh_results(self):
+        self._search_job = None
+        folder = self.folder_var.get()
+        rows = self.index.search(self.search_var.get(), root_dir=folder or None)
+
+        self.results.delete(*self.results.get_children())
+        for row in rows:
+            try:
+                file = os.path.relpath(row["path"], folder) if folder else row["path"]
+            except ValueError:
+                file = row["path"]  # Windows: файл на другом диске
+            if row["error"]:
+                defects = "ошибка чтения"
+            elif row["categories"]:
+                defects = f"{row['defects_total']} ({format_categories(row['categories'])})"
+            else:
+                defects = str(row["defects_total"])
+            self.results.insert(
+                "", "end", iid=row["path"],
+                values=(
+                    row["bridge_id"], row["road"], row["km"], row["coord"],
+                    row["inspection_current"], defects,
+                    file,
+                )
+            )
+
+    def open_selected(self):
+        sel = self.results.selection()
+        if not sel:
+            return
+        path = sel[0]
+        if not os.path.isfile(path):
+            messagebox.showerror("Ошибка", "Файл не найден. Обновите индекс.", parent=self)
+            return
+        self.close()
+        self.on_open(path)
+
+    def close(self):
+        self._closed = True
+        if self._scan_state:
+            self._scan_state["cancel"] = True
+        if self._maps_state:
+            self._maps_state["cancel"] = True
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self.index.close()
+        self.destroy()
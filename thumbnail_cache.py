@@ -0,0 +1,149 @@
+# thumbnail_cache.py
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from constants import THUMBS_DIR
+
+THUMB_SIZE = 160
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class ThumbnailCache:
+    """
+    Миниатюры фотографий: пул фоновых потоков + кэш на диске
+    (APP_DATA_DIR/thumbs) с ключом «путь + mtime + размер файла» —
+    изменённый или заменённый файл получает новую миниатюру сам.
+
+    Готовые миниатюры (PIL.Image) складываются в очередь results;
+    интерфейс забирает их через poll() из своего потока — Tk из
+    рабочих потоков не трогаем. Последние миниатюры держатся в памяти
+    (LRU), чтобы прокрутка туда-обратно не читала диск.
+    """
+
+    def __init__(self, cache_dir: str = THUMBS_DIR, size: int = THUMB_SIZE,
+                 workers: int = None, memory_items: int = 600):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory_items = memory_items
+        self._memory = OrderedDict()   # path -> (stamp, Image)
+        self._pending = {}             # path -> Future
+        self._lock = threading.Lock()
+        self.results = queue.Queue()   # (path, Image или None)
+        workers = workers or min(4, os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="thumbs")
+
+    # ---------- ключ и файлы кэша ----------
+
+    @staticmethod
+    def _stamp(path: str):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _cache_path(self, path: str, stamp) -> str:
+        # "o" — миниатюра уже повёрнута по EXIF (старые записи не подходят)
+        raw = f"{os.path.abspath(path)}|{stamp[0]}|{stamp[1]}|{self.size}|o"
+        key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".jpg")
+
+    # ---------- запросы ----------
+
+    def get_memory(self, path: str):
+        """Миниатюра из памяти без обращения к диску (или None)"""
+        with self._lock:
+            item = self._memory.get(path)
+            if item is None:
+                return None
+            self._memory.move_to_end(path)
+            return item[1]
+
+    def request(self, path: str):
+        """Поставить миниатюру в очередь; результат придёт в results"""
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending[path] = self._pool.submit(self._work, path)
+
+    def cancel_except(self, keep):
+        """Снять ещё не начатые задачи для путей вне keep (ушли из вида)"""
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in keep and future.cancel():
+                    del self._pending[path]
+
+    def poll(self, limit: int = 64) -> list:
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending) or not self.results.empty()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- рабочий поток ----------
+
+    def _work(self, path: str):
+        try:
+            img = self._load(path)
+        except Exception:
+            img = None
+        with self._lock:
+            self._pending.pop(path, None)
+        self.results.put((path, img))
+
+    def _load(self, path: str):
+        stamp = self._stamp(path)
+        with self._lock:
+            item = self._memory.get(path)
+        if item is not None and item[0] == stamp:
+            return item[1]
+
+        cache_path = self._cache_path(path, stamp)
+        img = None
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    img = cached.convert("RGB")
+            except Exception:
+                img = None
+        if img is None:
+            img = self._make(path)
+            self._save(img, cache_path)
+
+        with self._lock:
+            self._memory[path] = (stamp, img)
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return img
+
+    def _make(self, path: str):
+        with Image.open(path) as src:
+            # JPEG декодируется сразу в уменьшенном масштабе (1/2…1/8)
+            src.draft("RGB", (self.size * 2, self.size * 2))
+            img = ImageOps.exif_transpose(src).convert("RGB")
+        img.thumbnail((self.size, self.size), Image.BILINEAR)
+        return img
+
+    @staticmethod
+    def _save(img, cache_path: str):
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp = f"{cache_path}.{threading.get_ident()}.tmp"
+            img.save(tmp, "JPEG", quality=85)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass  # кэш — не критично: в следующий раз миниатюра соберётся снова
@@ -3,18 +3,38 @@ import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, Menu
 import ctypes
+import os
+import threading
 
+from constants import UNTITLED_PROJECT_PATH
 from database import Database
 from export import export_to_docx, export_report_to_docx
 from utils import generate_uid
-from project_storage import save_json, load_json
+from project_storage import (
+    save_json, load_json, encode_project, is_project_file, GZIP_SUFFIX
+)
+from project_container import ProjectContainer, BDRT_SUFFIX, DEFECT_PAGE_SIZE
+from project_journal import (
+    ProjectJournal, journal_path_for, read_journal, read_snapshot, replay_journal
+)
 from project_model import make_empty_project
+from defect_store import DefectStore
+from undo_history import UndoHistory
 from tabs.tab_general import GeneralTabMixin
 from tabs.tab_spans import SpansTabMixin
 from tabs.tab_piers import PiersTabMixin
 from tabs.tab_defects import DefectsTabMixin
 from tabs.tab_photos import PhotosTabMixin
+from tabs.workspace_dialog import WorkspaceDialog
 
+# как часто журнал правок уплотняется в файл проекта
+AUTOSAVE_COMPACT_MS = 60_000
+
+PROJECT_FILETYPES = [
+    ("JSON project", "*.json"),
+    ("Compressed JSON project", f"*{GZIP_SUFFIX}"),
+    ("Project container", f"*{BDRT_SUFFIX}"),
+]
 
 class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,PhotosTabMixin):
     def __init__(self, root):
@@ -33,6 +53,16 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
         self.defect_numodm_map = {}
         self.defect_categories_by_option = {}
 
+        # журнал правок: файл проекта (JSON) или автосохранение безымянного
+        self.project_path = None
+        self.project_container = None  # открытый .bdrt (инкрементальное сохранение)
+        self._defect_pages = None  # непрочитанные порции дефектов открытого .bdrt
+        self.edit_journal = ProjectJournal()
+        self._placeholder_items = {}  # uid -> пустой лист ПС/опоры, ещё не записанный в журнал
+        recovered = self._start_journal()
+        # история отмены: добавление/удаление/правка дефектов, листы ПС и опор
+        self.history = UndoHistory()
+
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True)
 
@@ -48,6 +78,14 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
         self.notebook.add(self.tab_defects, text="Дефекты")
         self.notebook.add(self.tab_photos, text="Фотографии")
 
+        # индикатор поэтапной загрузки проекта (показывается только при открытии)
+        self.load_bar = ttk.Frame(self.root, padding=(10, 2))
+        self.load_label = ttk.Label(self.load_bar, text="")
+        self.load_label.pack(side="left")
+        self.load_progress = ttk.Progressbar(self.load_bar, length=240)
+        self.load_progress.pack(side="right")
+        self._load_token = 0
+
 
         self.bridge_vars = {}  # ключ поля -> tk.StringVar
         self.span_forms = {}  # uid -> {"frame": Frame, "vars": {key: StringVar}}
@@ -55,12 +93,117 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
 
         self.build_ui()
         self.is_loading = False
-        self.is_dirty = False
-        
+        self.is_dirty = recovered
+        self.root.after(AUTOSAVE_COMPACT_MS, self._autosave_tick)
+
 
     def _generate_uid(self):
         return generate_uid()
 
+    # ---------- журнал правок / автосохранение ----------
+
+    def _journal(self, op, **data):
+        """Записывает правку проекта в журнал автосохранения"""
+        journal = getattr(self, "edit_journal", None)
+        if journal is None:
+            return
+        placeholder = self._placeholder_items.pop(data.get("uid"), None)
+        if placeholder is not None and op == "item_set":
+            # без этого правка листа-заглушки не восстановится после сбоя
+            journal.record("item_add", section=data["section"], item=placeholder)
+        journal.record(op, **data)
+
+    def _ask_recover(self) -> bool:
+        return messagebox.askyesno(
+            "Восстановление",
+            "Найдены несохранённые изменения после аварийного завершения."
+            "\n\nВосстановить их?"
+        )
+
+    def _recover(self, project_path, project, before_replay=None):
+        """
+        Снимок и журнал, оставшиеся от сбоя -> восстановленный проект
+        (или None, если восстанавливать нечего или пользователь отказался).
+        before_replay(project) вызывается, если журнал накатывается на
+        проект из файла, а не на снимок.
+        """
+        entries = read_journal(journal_path_for(project_path))
+        snapshot = read_snapshot(project_path)
+        if not entries and snapshot is None:
+            return None
+        if not self._ask_recover():
+            return None
+        if snapshot is not None:
+            project = snapshot
+        elif before_replay is not None:
+            before_replay(project)
+        replay_journal(project, entries)
+        return project
+
+    def _start_journal(self) -> bool:
+        """Восстанавливает безымянный проект после сбоя и включает журнал"""
+        project = self._recover(UNTITLED_PROJECT_PATH, make_empty_project())
+        self.edit_journal.open(UNTITLED_PROJECT_PATH)
+        if project is None:
+            return False
+        self.project = project
+        self._compact_journal()
+        return True
+
+    def _compact_journal(self):
+        """
+        Сворачивает накопленные правки в снимок восстановления рядом
+        с проектом и обнуляет журнал. Файл проекта не меняется — правки
+        попадают в него только при сохранении.
+        """
+        self._finish_defect_loading()
+        self.edit_journal.compact(encode_project(self.project, compact=True))
+
+    def _autosave_tick(self):
+        if self.edit_journal.pending_since_compact:
+            try:
+                self._compact_journal()
+            except Exception:
+                pass  # журнал остаётся — попробуем в следующий раз
+        self.root.after(AUTOSAVE_COMPACT_MS, self._autosave_tick)
+
+    # ---------- файлы проекта ----------
+
+    def _set_container(self, container):
+        if self.project_container is not None and self.project_container is not container:
+            self.project_container.close()
+        self.project_container = container
+
+    def _read_project_file(self, file_path):
+        """
+        Читает проект (.json / .json.gz / .bdrt) -> (project, container|None).
+        Дефекты .bdrt не читаются — они догружаются порциями из контейнера.
+        """
+        container = None
+        if file_path.lower().endswith(BDRT_SUFFIX):
+            container = ProjectContainer(file_path)
+            try:
+                project = container.load_project(lazy_defects=True)
+            except Exception:
+                container.close()
+                raise
+        else:
+            project = load_json(file_path)
+            project["defects"] = DefectStore(project.get("defects") or [])
+        return project, container
+
+    def _write_project_file(self, file_path):
+        if file_path.lower().endswith(BDRT_SUFFIX):
+            container = self.project_container
+            if container is None or container.path != file_path:
+                container = ProjectContainer(file_path)
+            # в .bdrt записываются только изменившиеся строки
+            container.save_project(self.project)
+            self._set_container(container)
+        else:
+            save_json(file_path, self.project)
+            self._set_container(None)
+
     def build_menu(self):
         menubar: Menu = tk.Menu(self.root)
         
@@ -68,6 +211,8 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
         file_menu.add_command(label="Новое сооружение", 
                               command=self.new_project)
         file_menu.add_command(label="Открыть...", command=self.load_project)
+        file_menu.add_command(label="Открыть из рабочей папки...",
+                              command=self.open_from_workspace)
         file_menu.add_separator()
         file_menu.add_command(label="Сохранить паспорт...", command=self.save_project)
         file_menu.add_command(label="Сохранить отчёт...", command=self.save_report)
@@ -75,9 +220,39 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
         file_menu.add_command(label="Выход", command=self.on_close)
         
         menubar.add_cascade(label="Файл", menu=file_menu)
+
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Отменить", accelerator="Ctrl+Z",
+                              command=self.undo)
+        edit_menu.add_command(label="Повторить", accelerator="Ctrl+Y",
+                              command=self.redo)
+        menubar.add_cascade(label="Правка", menu=edit_menu)
         self.root.config(menu=menubar)
 
+        # в русской раскладке keysym другой — биндим оба варианта
+        for seq in ("<Control-z>", "<Control-Z>", "<Control-Cyrillic_ya>"):
+            self.root.bind(seq, lambda e: self.undo())
+        for seq in ("<Control-y>", "<Control-Y>", "<Control-Cyrillic_en>"):
+            self.root.bind(seq, lambda e: self.redo())
+
+    def undo(self):
+        label = self.history.undo()
+        if label:
+            self._after_history_step(f"Отменено: {label}")
+
+    def redo(self):
+        label = self.history.redo()
+        if label:
+            self._after_history_step(f"Повторено: {label}")
+
+    def _after_history_step(self, text: str):
+        self.update_status_bar()
+        self.is_dirty = True
+        self.status_label.config(text=text)
+        self.root.after(2000, lambda: self.status_label.config(text=""))
+
     def save_project(self):
+        self._finish_defect_loading()
         is_empty = (not self.project["bridge"]) and (not self.project[
             "defects"]) and (not self.project["spans"]) and (not
             self.project["piers"])
@@ -87,15 +262,17 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
 
         file_path = filedialog.asksaveasfilename(
             defaultextension=".docx",
-            filetypes=[("Word document", "*.docx"),
-                       ("JSON project", "*.json")]
+            filetypes=[("Word document", "*.docx")] + PROJECT_FILETYPES
         )
         if not file_path:
             return False
 
         try:
-            if file_path.lower().endswith(".json"):
-                save_json(file_path, self.project)
+            if is_project_file(file_path) or file_path.lower().endswith(BDRT_SUFFIX):
+                self._write_project_file(file_path)
+                self.project_path = file_path
+                # всё сохранено — журнал начинаем заново
+                self.edit_journal.open(file_path)
             else:
                 export_to_docx(file_path, self.project)
 
@@ -108,6 +285,7 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
             return False
         
     def save_report(self):
+        self._finish_defect_loading()
         is_empty = (not self.project["bridge"]) and (not self.project["defects"]) and (not self.project["spans"]) and (not self.project["piers"])
         if is_empty:
             messagebox.showwarning("Нет данных", "Проект пустой — нечего сохранять.")
@@ -132,62 +310,141 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
 
 
     def load_project(self):
-        file_path = filedialog.askopenfilename(
-            filetypes=[("JSON project", "*.json")]
-        )
+        file_path = filedialog.askopenfilename(filetypes=PROJECT_FILETYPES)
         if not file_path:
             return
+        self.open_project_file(file_path)
+
+    def open_from_workspace(self):
+        WorkspaceDialog(self.root, on_open=self.open_project_file)
+
+    def open_project_file(self, file_path):
+        """
+        Открывает проект: файл разбирается в фоновом потоке, затем виджеты
+        заполняются порциями через root.after — окно не замирает, а Форма 1
+        доступна сразу, пока достраиваются листы и таблицы.
+        """
+        self._load_token += 1
+        token = self._load_token
+        state = {"result": None, "error": None}
+
+        def worker():
+            try:
+                state["result"] = self._read_project_file(file_path)
+            except Exception as e:
+                state["error"] = e
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self._show_load_progress("Чтение файла…")
+        self._poll_project_read(file_path, thread, state, token)
+
+    def _poll_project_read(self, file_path, thread, state, token):
+        if thread.is_alive():
+            self.root.after(50, lambda: self._poll_project_read(
+                file_path, thread, state, token))
+            return
 
-        try:
-            project = load_json(file_path)
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось загрузить файл:\n{e}")
+        if token != self._load_token:
+            # открыт другой проект или создан новый — результат не нужен
+            if state["result"] is not None and state["result"][1] is not None:
+                state["result"][1].close()
+            return
+        if state["error"] is not None:
+            self._hide_load_progress()
+            messagebox.showerror("Ошибка", f"Не удалось загрузить файл:\n{state['error']}")
             return
 
-        self.project = project #Загрузка всего проекта
-        self.rebuild_span_tabs()
-        self.rebuild_pier_tabs()
-        self.refresh_general_tab_from_project()
-        self.table.delete(*self.table.get_children())
-
-        for rec in self.project["defects"]:
-            uid = rec.get("uid")
-            if not uid:
-                continue
-
-            
-            cats = []
-            if rec.get("safety"):
-                cats.append(f"Б{rec['safety']}")
-            if rec.get("durability"):
-                cats.append(f"Д{rec['durability']}")
-            if rec.get("repairability"):
-                cats.append(f"Р{rec['repairability']}")
+        project, container = state["result"]
+        self._apply_loaded_project(file_path, project, container, token)
+
+    def _show_load_progress(self, text: str):
+        self.load_label.config(text=text)
+        self.load_progress.config(mode="indeterminate")
+        self.load_progress.start(15)
+        if not self.load_bar.winfo_ismapped():
+            self.load_bar.pack(side="bottom", fill="x", before=self.notebook)
+
+    def _hide_load_progress(self):
+        self.load_progress.stop()
+        self.load_bar.pack_forget()
+
+    def _run_load_steps(self, steps, on_done, token):
+        """Выполняет шаги заполнения UI по одному за проход цикла событий"""
+        self.load_progress.stop()
+        self.load_progress.config(mode="determinate", maximum=max(1, len(steps)), value=0)
+
+        def run(i):
+            if token != self._load_token:
+                return
+            if i >= len(steps):
+                self._hide_load_progress()
+                on_done()
+                return
+            self.is_loading = True
             try:
-                if rec.get("loadcap") and int(rec["loadcap"]) == 1:
-                    cats.append("Г")
-            except:
-                pass
-
-            self.table.insert(
-                "",
-                "end",
-                iid=uid,
-                values=(
-                    rec.get("placement", ""),
-                    rec.get("location", ""),
-                    rec.get("name", ""),
-                    rec.get("option", ""),
-                    ", ".join(cats),
-                    rec.get("action", "")
-                )
-            )
+                steps[i]()
+            finally:
+                self.is_loading = False
+            self.load_progress.config(value=i + 1)
+            self.root.after(1, lambda: run(i + 1))
+
+        run(0)
+
+    def _apply_loaded_project(self, file_path, project, container, token):
+        self._defect_pages = None
+        pages = container.iter_defects(DEFECT_PAGE_SIZE) if container is not None else None
+        count = container.count_defects() if container is not None else 0
+
+        def read_all_defects(project):
+            # журнал правит весь список — дочитываем его до накатки
+            nonlocal pages
+            for page in pages or ():
+                project["defects"].load_page(page)
+            pages = None
+
+        # правки после последнего сохранения, оставшиеся от сбоя
+        recovered_project = self._recover(file_path, project, read_all_defects)
+        recovered = recovered_project is not None
+        if recovered:
+            project = recovered_project
+            pages = None  # дефекты уже в снимке или дочитаны перед журналом
 
-        self.update_status_bar()
-        self.refresh_photos_tab_from_project()
-        self.status_label.config(text="Данные загружены")
-        self.root.after(2000, lambda: self.status_label.config(text=""))
-        self.is_dirty = False
+        self.project = project #Загрузка всего проекта
+        self.project_path = file_path
+        self.history.clear()
+        self._set_container(container)
+        self.edit_journal.open(file_path)
+        if recovered:
+            self._compact_journal()
+        # флаг ставим сразу: правки, сделанные во время догрузки вкладок, его не потеряют
+        self.is_dirty = recovered
+
+        # таблица дефектов виртуальная — переключаем её сразу
+        self.reset_defect_views()
+
+        def show_photos_header():
+            self._ensure_photos_block()
+            self.photos_folder_var.set(self.project["photos"].get("folder", "") or "")
+            self.refresh_cover_controls()
+            self.refresh_photo_grid()
+
+        # сначала Форма 1 и дефекты порциями, затем листы ПС/опор по одному
+        # и галерея порциями
+        steps = [self.refresh_general_tab_from_project]
+        if pages is not None:
+            steps += self.defect_page_steps(pages, count, DEFECT_PAGE_SIZE)
+        steps += self.span_tab_steps()
+        steps += self.pier_tab_steps()
+        steps.append(show_photos_header)
+        steps += self.gallery_table_steps()
+
+        def done():
+            self.status_label.config(text="Данные загружены")
+            self.root.after(2000, lambda: self.status_label.config(text=""))
+
+        self.load_label.config(text=f"Загрузка: {os.path.basename(file_path)}")
+        self._run_load_steps(steps, done, token)
 
     def new_project(self):
 
@@ -202,16 +459,25 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
                 "Текущие данные будут потеряны. Продолжить?"
             ):
                 return
-        # сбрасываем проект
+        # сбрасываем проект (и прерываем незавершённую загрузку)
+        self._load_token += 1
+        self._hide_load_progress()
+        self._defect_pages = None
         self.project = make_empty_project()
+        self.project_path = None
+        self.history.clear()
+        self._set_container(None)
+        self.edit_journal.open(UNTITLED_PROJECT_PATH)
+
+        self.is_loading = True
         self.rebuild_span_tabs()
         self.rebuild_pier_tabs()
         # очищаем таблицу дефектов
-        self.table.delete(*self.table.get_children())
-        self.update_status_bar()
+        self.reset_defect_views()
 
         # обновить вкладку Ф1 из проекта (он теперь пустой)
         self.refresh_general_tab_from_project()
+        self.is_loading = False
 
         self.is_dirty = False
 
@@ -242,9 +508,15 @@ class DefectApp(GeneralTabMixin, SpansTabMixin, PiersTabMixin, DefectsTabMixin,P
                 saved = self.save_project()
                 if not saved:
                     return
+        # штатный выход: журнал для восстановления больше не нужен
+        self.edit_journal.discard()
+        self.edit_journal.close()
+        self._set_container(None)
+        self.thumb_cache.shutdown()
         self.root.destroy()
 
     def export_docx(self):
+        self._finish_defect_loading()
         # Временно: экспортируем только если есть дефекты
         if not self.project["defects"]:
             messagebox.showwarning("Нет данных", "Сначала добавьте данные в отчёт.")
@@ -0,0 +1,66 @@
+# undo_history.py
+from collections import deque
+
+
+class Command:
+    """
+    Обратимое действие. Хранит только сами изменения
+    (добавленные/удалённые записи, старые и новые значения полей),
+    а не копию проекта.
+    """
+    __slots__ = ("label", "undo", "redo")
+
+    def __init__(self, label: str, undo, redo):
+        self.label = label
+        self.undo = undo
+        self.redo = redo
+
+
+class UndoHistory:
+    """Ограниченная история отмены/повтора на объектах Command"""
+
+    def __init__(self, limit: int = 500):
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+        self.applying = False
+
+    def push(self, label: str, undo, redo):
+        # действия, выполняемые самой отменой/повтором, не записываем
+        if self.applying:
+            return
+        self._undo.append(Command(label, undo, redo))
+        self._redo.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self):
+        """Отменяет последнее действие, возвращает его подпись или None"""
+        if not self._undo:
+            return None
+        cmd = self._undo.pop()
+        self._apply(cmd.undo)
+        self._redo.append(cmd)
+        return cmd.label
+
+    def redo(self):
+        if not self._redo:
+            return None
+        cmd = self._redo.pop()
+        self._apply(cmd.redo)
+        self._undo.append(cmd)
+        return cmd.label
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def _apply(self, fn):
+        self.applying = True
+        try:
+            fn()
+        finally:
+            self.applying = False
@@ -0,0 +1,230 @@
+# workspace_index.py
+import json
+import os
+import sqlite3
+from collections import Counter
+
+from constants import WORKSPACE_INDEX_PATH
+from project_container import BDRT_SUFFIX
+from project_storage import load_project_file, project_suffixes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    root TEXT,
+    mtime REAL,
+    size INTEGER,
+    bridge_id TEXT,
+    road TEXT,
+    road_code TEXT,
+    km TEXT,
+    coord TEXT,
+    inspection_current TEXT,
+    inspection_prev TEXT,
+    defects_total INTEGER,
+    categories TEXT,
+    error TEXT,
+    search TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_root ON files(root);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# поля Формы 1, которые попадают в индекс: колонка -> ключ bridge
+INDEXED_BRIDGE_FIELDS = {
+    "bridge_id": "id",
+    "road": "road",
+    "road_code": "road_code",
+    "km": "km",
+    "coord": "coord",
+    "inspection_current": "inspection_current",
+    "inspection_prev": "inspection_prev",
+}
+
+RESULT_COLUMNS = (
+    "path", "bridge_id", "road", "road_code", "km", "coord",
+    "inspection_current", "inspection_prev", "defects_total", "categories", "error",
+)
+
+
+def is_workspace_project(filename: str) -> bool:
+    lower = filename.lower()
+    if lower.startswith(".tmp_"):
+        return False
+    return lower.endswith(project_suffixes() + (BDRT_SUFFIX,))
+
+
+def category_counts(defects) -> dict:
+    """Количество дефектов по категориям: {"Б2": 3, "Д3": 5, "Г": 1, ...}"""
+    counts = Counter()
+    for rec in defects:
+        for letter, key in (("Б", "safety"), ("Д", "durability"), ("Р", "repairability")):
+            value = str(rec.get(key) or "").strip()
+            if value and value != "0":
+                counts[f"{letter}{value}"] += 1
+        try:
+            if rec.get("loadcap") and int(rec["loadcap"]) == 1:
+                counts["Г"] += 1
+        except (TypeError, ValueError):
+            pass
+    return dict(sorted(counts.items()))
+
+
+def format_categories(categories: dict) -> str:
+    return ", ".join(f"{k}: {v}" for k, v in categories.items())
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class WorkspaceIndex:
+    """
+    Индекс папки с проектами мостов в локальной SQLite.
+
+    scan() обходит дерево папок и перечитывает только те файлы, у которых
+    изменились mtime или размер; search() ищет по ID, дороге, коду дороги,
+    км-привязке, координатам и датам обследования.
+    Экземпляр нельзя передавать между потоками — в фоне создавайте свой.
+    """
+
+    def __init__(self, db_path=WORKSPACE_INDEX_PATH):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get_setting(self, key: str, default: str = "") -> str:
+        row = self.conn.execute(
+            "SELECT value FROM settings WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def set_setting(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                (key, value)
+            )
+
+    def scan(self, root_dir: str, progress=None, cancel=None) -> dict:
+        """
+        Обновляет индекс для root_dir. progress(done, total) вызывается
+        по мере разбора файлов; cancel() -> True прерывает обход.
+        Возвращает {"parsed": n, "unchanged": n, "removed": n}.
+        """
+        root_dir = os.path.abspath(root_dir)
+        known = {
+            path: (mtime, size) for path, mtime, size in self.conn.execute(
+                "SELECT path, mtime, size FROM files WHERE root = ?", (root_dir,)
+            )
+        }
+
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if not is_workspace_project(filename):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (st.st_mtime, st.st_size)
+
+        changed = [p for p, sig in found.items() if known.get(p) != sig]
+        removed = [(p,) for p in known.keys() - found.keys()]
+
+        rows = []
+        for i, path in enumerate(changed):
+            if cancel is not None and cancel():
+                break
+            rows.append(self._index_row(root_dir, path, *found[path]))
+            if progress is not None:
+                progress(i + 1, len(changed))
+
+        with self.conn:
+            if removed:
+                self.conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, root, mtime, size, bridge_id, road, "
+                "road_code, km, coord, inspection_current, inspection_prev, "
+                "defects_total, categories, error, search) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        return {
+            "parsed": len(rows),
+            "unchanged": len(found) - len(changed),
+            "removed": len(removed),
+        }
+
+    @staticmethod
+    def _index_row(root_dir, path, mtime, size) -> tuple:
+        fields = {col: "" for col in INDEXED_BRIDGE_FIELDS}
+        total, categories, error = 0, {}, ""
+        try:
+            project = load_project_file(path)
+            bridge = project.get("bridge") or {}
+            for col, key in INDEXED_BRIDGE_FIELDS.items():
+                value = bridge.get(key, "")
+                fields[col] = "" if value is None else str(value)
+            defects = [r for r in project.get("defects") or [] if isinstance(r, dict)]
+            total = len(defects)
+            categories = category_counts(defects)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        search = " ".join(
+            list(fields.values()) + [os.path.basename(path)]
+        ).lower()
+        return (
+            path, root_dir, mtime, size,
+            fields["bridge_id"], fields["road"], fields["road_code"], fields["km"],
+            fields["coord"], fields["inspection_current"], fields["inspection_prev"],
+            total, json.dumps(categories, ensure_ascii=False), error, search,
+        )
+
+    def coordinates(self, root_dir: str = None) -> list:
+        """Непустые координаты мостов из индекса (для подготовки карт)"""
+        sql = "SELECT DISTINCT coord FROM files WHERE coord != ''"
+        params = []
+        if root_dir:
+            sql += " AND root = ?"
+            params.append(os.path.abspath(root_dir))
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def search(self, text: str = "", root_dir: str = None, limit: int = 500) -> list:
+        """
+        Ищет проекты: все слова запроса должны встречаться в ключевых полях
+        (без учёта регистра). Возвращает список словарей RESULT_COLUMNS.
+        """
+        where, params = [], []
+        if root_dir:
+            where.append("root = ?")
+            params.append(os.path.abspath(root_dir))
+        for token in (text or "").lower().split():
+            where.append("search LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like_escape(token)}%")
+
+        sql = f"SELECT {', '.join(RESULT_COLUMNS)} FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY road, km, path LIMIT ?"
+        params.append(limit)
+
+        result = []
+        for row in self.conn.execute(sql, params):
+            item = dict(zip(RESULT_COLUMNS, row))
+            item["categories"] = json.loads(item["categories"] or "{}")
+            result.append(item)
+        return result